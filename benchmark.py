@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import cubo
+import datos
+import script
+from datos import COLUMNAS, ESQUEMA, RUTA_DATOS
+from exportar import guardar_imagen, huella_figuras, renderizar
+from geo import RUTA_GEOJSON, cargar_geojson
+from poblacion import obtener_poblacion
+
+
+# La carpeta del repositorio, de donde tomamos los assets.
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+# El año de población que usamos para repartir los registros entre entidades.
+AÑO_POBLACION = 2020
+
+# Los años de los mapas que se miden.
+AÑOS_MAPAS = [2010, 2017, 2023]
+
+
+def generar_datos(filas, ruta, semilla=0, bloque=1_000_000):
+    """
+    Genera microdatos sintéticos con la misma estructura que la EMAT.
+
+    Los registros se reparten entre entidades según su población adulta,
+    la proporción de matrimonios del mismo sexo crece con los años, las
+    edades tienen valores 99 (no especificado) y algunos contrayentes
+    residen en una entidad distinta a la de registro.
+
+    Parameters
+    ----------
+    filas : int
+        El número de registros a generar.
+
+    ruta : str
+        La ruta del archivo CSV que se va a crear.
+
+    semilla : int
+        La semilla del generador de números aleatorios.
+
+    bloque : int
+        El número de registros que se generan y escriben a la vez.
+
+    """
+
+    rng = np.random.default_rng(semilla)
+
+    # Cargamos la población adulta total de cada entidad, en orden de clave.
+    pop = obtener_poblacion(AÑO_POBLACION, np.arange(1, 33))
+
+    pesos = pop / pop.sum()
+
+    for inicio in range(0, filas, bloque):
+        n = min(bloque, filas - inicio)
+
+        año = rng.integers(2010, 2024, n)
+        entidad = rng.choice(np.arange(1, 33), n, p=pesos)
+
+        # La proporción de matrimonios del mismo sexo va de 0.1% a 1%.
+        mismo_sexo = rng.random(n) < 0.001 + (año - 2010) * 0.0007
+        sexo_mismo = np.where(rng.random(n) < 0.5, 1, 2)
+
+        # En matrimonios del sexo opuesto casi siempre el primer contrayente es el hombre.
+        sexo_opuesto = np.where(rng.random(n) < 0.97, 1, 2)
+
+        sexo1 = np.where(mismo_sexo, sexo_mismo, sexo_opuesto)
+        sexo2 = np.where(mismo_sexo, sexo_mismo, 3 - sexo_opuesto)
+
+        edad1 = np.minimum(18 + rng.gamma(2.0, 6.0, n), 98).astype(int)
+        edad2 = np.minimum(18 + rng.gamma(2.0, 5.5, n), 98).astype(int)
+        edad1[rng.random(n) < 0.003] = 99
+        edad2[rng.random(n) < 0.003] = 99
+
+        df = pd.DataFrame(
+            {
+                "ANIO_REGIS": año,
+                "ENT_REGIS": entidad,
+                "SEXO_CON1": sexo1,
+                "SEXO_CON2": sexo2,
+                "EDAD_CON1": edad1,
+                "EDAD_CON2": edad2,
+                "ENTRH_CON1": generar_residencia(rng, entidad, pesos),
+                "ENTRH_CON2": generar_residencia(rng, entidad, pesos),
+            }
+        )
+
+        df.to_csv(
+            ruta, mode="w" if inicio == 0 else "a", header=inicio == 0, index=False
+        )
+
+
+def generar_residencia(rng, entidad, pesos):
+    """
+    Genera la entidad de residencia de un contrayente.
+
+    El 93% reside en la entidad de registro, 5% en otra entidad,
+    1% en el extranjero (33) y 1% no está especificado (99).
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        El generador de números aleatorios.
+
+    entidad : numpy.ndarray
+        La entidad de registro de cada matrimonio.
+
+    pesos : numpy.ndarray
+        La proporción de la población adulta de cada entidad.
+
+    Returns
+    -------
+    numpy.ndarray
+        La entidad de residencia de cada contrayente.
+
+    """
+
+    azar = rng.random(len(entidad))
+    otra = rng.choice(np.arange(1, 33), len(entidad), p=pesos)
+
+    return np.select(
+        [azar < 0.93, azar < 0.98, azar < 0.99],
+        [entidad, otra, 33],
+        99,
+    )
+
+
+@contextmanager
+def cronometro(resultados, etapa, filas):
+    """
+    Mide el tiempo de una etapa y lo agrega a los resultados.
+
+    Parameters
+    ----------
+    resultados : list
+        La lista donde se agregan los resultados.
+
+    etapa : str
+        El nombre de la etapa.
+
+    filas : int
+        El número de registros del dataset.
+
+    """
+
+    inicio = time.perf_counter()
+    yield
+    segundos = time.perf_counter() - inicio
+
+    resultados.append({"etapa": etapa, "filas": filas, "segundos": segundos})
+    print(f"{filas:>13,} {etapa:<24} {segundos:>10.3f} s")
+
+
+def medir(filas, imagenes=True):
+    """
+    Mide cada etapa del proceso con un dataset sintético.
+
+    Parameters
+    ----------
+    filas : int
+        El número de registros del dataset.
+
+    imagenes : bool
+        Si es False no se miden las etapas de Kaleido y composición.
+
+    Returns
+    -------
+    list
+        Un diccionario por etapa con su nombre, el número de registros y los segundos.
+
+    """
+
+    resultados = list()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        # Nuestras funciones usan rutas relativas, así que trabajamos dentro
+        # de la carpeta temporal. Enlazamos la población, que solo se lee, y
+        # copiamos el GeoJSON para que su versión simplificada se guarde ahí.
+        os.makedirs(os.path.join(carpeta, "assets"))
+        os.symlink(
+            os.path.join(CARPETA, "assets", "poblacion_adulta"),
+            os.path.join(carpeta, "assets", "poblacion_adulta"),
+        )
+
+        # El GeoJSON de México no siempre está disponible.
+        geojson = os.path.join(CARPETA, RUTA_GEOJSON)
+
+        if os.path.exists(geojson):
+            shutil.copy(geojson, os.path.join(carpeta, RUTA_GEOJSON))
+
+        anterior = os.getcwd()
+        os.chdir(carpeta)
+
+        # Descartamos los datos cargados en mediciones anteriores.
+        datos._datos = None
+        cubo._tablas.clear()
+        cubo._huella = None
+
+        try:
+            with cronometro(resultados, "generacion", filas):
+                generar_datos(filas, RUTA_DATOS)
+
+            with cronometro(resultados, "carga_csv", filas):
+                df = pd.read_csv(RUTA_DATOS, usecols=COLUMNAS, dtype=ESQUEMA)
+
+            with cronometro(resultados, "cache_feather", filas):
+                datos.guardar_cache(df)
+
+            with cronometro(resultados, "carga_feather", filas):
+                df = datos.cargar_datos()
+
+            with cronometro(resultados, "filtro", filas):
+                df[df["SEXO_CON1"] == df["SEXO_CON2"]]
+                df[df["ANIO_REGIS"] == 2017]
+
+            with cronometro(resultados, "agregacion_cubo", filas):
+                cubo.construir_cubo(df)
+
+            with cronometro(resultados, "agregacion_histograma", filas):
+                cubo.construir_histograma(df)
+
+            # Creamos y guardamos las tablas una vez, así la siguiente
+            # medición solo incluye su lectura desde disco.
+            cubo.cargar_cubo()
+            cubo.cargar_histograma()
+            cubo._tablas.clear()
+
+            with cronometro(resultados, "carga_agregados", filas):
+                cubo.cargar_cubo()
+                cubo.cargar_histograma()
+
+            with cronometro(resultados, "agregacion_graficas", filas):
+                sexo = cubo.tasas_por_sexo()
+                mismo_sexo = cubo.tasas_por_año(True)
+                sexo_opuesto = cubo.tasas_por_año(False)
+                hombres = cubo.edades_por_año(1)
+                mujeres = cubo.edades_por_año(2)
+                entidades = cubo.tasas_por_entidad(AÑOS_MAPAS)
+
+            mapas = os.path.exists(RUTA_GEOJSON)
+
+            if mapas:
+                with cronometro(resultados, "carga_geojson", filas):
+                    geojson = cargar_geojson()
+
+            with cronometro(resultados, "figuras", filas):
+                trabajos = [
+                    ([script.figura_tendencia(sexo)], "./tendencia.png"),
+                    (
+                        [script.figura_tendencia_mismo_sexo(mismo_sexo)],
+                        "./tendencia_mismo_sexo.png",
+                    ),
+                    (
+                        [script.figura_tendencia_sexo_opuesto(sexo_opuesto)],
+                        "./tendencia_sexo_opuesto.png",
+                    ),
+                    ([script.figura_edades_hombres(hombres)], "./edades_hombres.png"),
+                    ([script.figura_edades_mujeres(mujeres)], "./edades_mujeres.png"),
+                ]
+
+                if mapas:
+                    for año in AÑOS_MAPAS:
+                        figuras = script.figuras_mapa(
+                            año, entidades[entidades["año"] == año], geojson
+                        )
+                        trabajos.append((figuras, f"./mapa_{año}.png"))
+
+            with cronometro(resultados, "huellas", filas):
+                for figuras, _ in trabajos:
+                    huella_figuras(figuras)
+
+            if imagenes:
+                with cronometro(resultados, "kaleido", filas):
+                    partes = [renderizar(figuras) for figuras, _ in trabajos]
+
+                with cronometro(resultados, "composicion", filas):
+                    for parte, (_, ruta) in zip(partes, trabajos):
+                        guardar_imagen(parte, ruta)
+        finally:
+            os.chdir(anterior)
+            datos._datos = None
+            cubo._tablas.clear()
+            cubo._huella = None
+
+    return resultados
+
+
+def obtener_version():
+    """
+    Regresa el commit actual del repositorio, si está disponible.
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=CARPETA,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mide cada etapa del proceso con datos sintéticos de la EMAT."
+    )
+
+    parser.add_argument(
+        "--filas",
+        type=int,
+        nargs="+",
+        default=[100_000, 1_000_000],
+        help="Los tamaños de dataset a medir (de 100 mil a 100 millones de registros).",
+    )
+
+    parser.add_argument(
+        "--salida",
+        default="./benchmark.jsonl",
+        help="El archivo JSON Lines donde se agregan los resultados.",
+    )
+
+    parser.add_argument(
+        "--sin-imagenes",
+        action="store_true",
+        help="No mide las etapas de Kaleido y composición.",
+    )
+
+    args = parser.parse_args()
+
+    version = obtener_version()
+    fecha = datetime.now().isoformat(timespec="seconds")
+
+    with open(args.salida, "a", encoding="utf-8") as archivo:
+        for filas in args.filas:
+            for resultado in medir(filas, imagenes=not args.sin_imagenes):
+                resultado = {"version": version, "fecha": fecha, **resultado}
+                archivo.write(json.dumps(resultado) + "\n")
@@ -0,0 +1,1050 @@
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+
+import datos
+from datos import (
+    ESQUEMA,
+    RUTA_DATOS,
+    años_particionados,
+    cargar_datos,
+    describir_esquema,
+    guardar_origen,
+    guardar_particion,
+    huella_datos,
+    leer_archivo,
+    leer_particion,
+    leer_por_bloques,
+    origen_vigente,
+    ruta_particion,
+)
+from instrumentacion import etapa, medir
+from intervalos import NIVEL, intervalo_bootstrap, intervalo_exacto
+from poblacion import ENTIDADES, obtener_poblacion, tasas
+
+
+# Rutas del cubo de agregados y del histograma de edades. Junto a cada
+# archivo se guarda la huella del dataset con el que fue creado.
+RUTA_CUBO = "./cubo.feather"
+RUTA_HISTOGRAMA = "./edades.feather"
+
+# Las columnas por las que agrupamos los registros. El par de sexos
+# identifica el tipo de pareja: hombre-hombre (1, 1), mujer-mujer (2, 2)
+# y sexo opuesto (1, 2) o (2, 1), según el orden de los contrayentes.
+DIMENSIONES = [
+    "ANIO_REGIS",
+    "ENT_REGIS",
+    "ENTRH_CON1",
+    "ENTRH_CON2",
+    "SEXO_CON1",
+    "SEXO_CON2",
+]
+
+# Las columnas por las que agrupamos el histograma de edades.
+DIMENSIONES_HISTOGRAMA = [
+    "ANIO_REGIS",
+    "SEXO_CON1",
+    "SEXO_CON2",
+    "CONTRAYENTE",
+    "EDAD",
+]
+
+# Cambiar este número obliga a volver a crear las tablas guardadas.
+VERSION_CUBO = 1
+
+# Aquí guardaremos las tablas una vez que hayan sido cargadas.
+_tablas = dict()
+
+# Aquí guardaremos la huella del dataset una vez que haya sido calculada.
+_huella = None
+
+
+def cargar_cubo(años=None):
+    """
+    Carga el cubo de agregados del dataset de nupcialidad.
+
+    El cubo se lee (o se crea) solo la primera vez que se llama esta función,
+    las siguientes llamadas reutilizan el DataFrame ya cargado.
+
+    Parameters
+    ----------
+    años : list
+        Los años de registro que se necesitan. Si el dataset está particionado
+        y el cubo completo no ha sido cargado, solo se leen esos años.
+        Por defecto se cargan todos.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una vista del cubo compartido, con una fila por cada combinación
+        observada de DIMENSIONES.
+
+    """
+
+    return cargar_tabla(RUTA_CUBO, construir_cubo, años)
+
+
+def cargar_histograma():
+    """
+    Carga el histograma de edades del dataset de nupcialidad.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una vista del histograma compartido.
+
+    """
+
+    return cargar_tabla(RUTA_HISTOGRAMA, construir_histograma)
+
+
+def cargar_tabla(ruta, construir, años=None):
+    """
+    Carga una tabla de agregados, creándola si es necesario.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta donde se guarda la tabla.
+
+    construir : callable
+        La función que crea la tabla a partir del dataset.
+
+    años : list
+        Los años de registro que se necesitan. Por defecto se cargan todos.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una vista de la tabla compartida, o solo las filas de los años indicados.
+
+    """
+
+    # Si solo necesitamos algunos años del dataset particionado,
+    # leemos únicamente sus tablas parciales.
+    if años is not None and ruta not in _tablas and años_particionados():
+        return leer_tabla_particionada(ruta, construir, años)
+
+    if ruta not in _tablas:
+        _tablas[ruta] = leer_tabla(ruta, construir)
+
+    tabla = _tablas[ruta].copy(deep=False)
+
+    if años is not None:
+        tabla = tabla[tabla["ANIO_REGIS"].isin(años)]
+
+    return tabla
+
+
+def leer_tabla(ruta, construir):
+    """
+    Lee una tabla de agregados guardada en disco.
+
+    Si la tabla no existe o fue creada con otra versión del dataset
+    se vuelve a crear a partir de este. Si el dataset está particionado
+    por año, la tabla se arma uniendo las tablas parciales de cada año.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta donde se guarda la tabla.
+
+    construir : callable
+        La función que crea la tabla a partir del dataset.
+
+    Returns
+    -------
+    pandas.DataFrame
+        La tabla de agregados.
+
+    """
+
+    if años_particionados():
+        return leer_tabla_particionada(ruta, construir)
+
+    huella = huella_tablas()
+
+    if tabla_vigente(ruta, huella):
+        return feather.read_feather(ruta)
+
+    if not datos.POR_BLOQUES:
+        tabla = construir(cargar_datos())
+        guardar_tabla(tabla, ruta, huella)
+
+        return tabla
+
+    # Leyendo por bloques creamos todas las tablas en una sola pasada
+    # por el dataset y dejamos en memoria las que aún no estaban cargadas.
+    for ruta_tabla, tabla in construir_por_bloques().items():
+        guardar_tabla(tabla, ruta_tabla, huella)
+        _tablas.setdefault(ruta_tabla, tabla)
+
+    return _tablas[ruta]
+
+
+def huella_tablas():
+    """
+    Calcula la huella del dataset con la que se crean las tablas de agregados.
+
+    Se calcula una sola vez por ejecución. Si el archivo CSV conserva el tamaño
+    y la fecha de modificación que tenía cuando se guardó alguna de las tablas,
+    se reutiliza su hash en lugar de volver a calcularlo.
+
+    Returns
+    -------
+    dict
+        El hash y esquema del dataset, la versión de las tablas y el tamaño
+        y fecha de modificación del archivo con el que se calculó el hash (origen).
+
+    """
+
+    global _huella
+
+    if _huella is None:
+        conocida = None
+
+        for ruta, _, _ in tablas_agregadas():
+            guardada = leer_huella(ruta)
+
+            if guardada is not None and "origen" in guardada:
+                conocida = {
+                    **guardada["origen"],
+                    "hash": guardada["hash"],
+                    "esquema": guardada["esquema"],
+                }
+                break
+
+        actual = huella_datos(conocida)
+
+        _huella = {
+            "hash": actual["hash"],
+            "esquema": describir_esquema(),
+            "version": VERSION_CUBO,
+            "origen": {"tamaño": actual["tamaño"], "modificado": actual["modificado"]},
+        }
+
+    return _huella
+
+
+def leer_tabla_particionada(ruta, construir, años=None):
+    """
+    Arma una tabla de agregados uniendo las tablas parciales de cada año
+    del dataset particionado. Solo se vuelven a crear las tablas parciales
+    de los años que cambiaron.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta de la tabla completa, su nombre se usa para las tablas parciales.
+
+    construir : callable
+        La función que crea la tabla a partir de los registros de un año.
+
+    años : list
+        Los años que se desean leer. Por defecto se leen todos.
+
+    Returns
+    -------
+    pandas.DataFrame
+        La tabla de agregados de los años disponibles.
+
+    """
+
+    if not origen_vigente():
+        warnings.warn(
+            f"{RUTA_DATOS} cambió después de crear el dataset particionado y sus "
+            "cambios no se usarán. Ejecuta 'python ingresar.py --particionar' "
+            "para volver a crearlo.",
+            stacklevel=2,
+        )
+
+    partes = list()
+
+    for año in años_particionados():
+        if años is not None and año not in años:
+            continue
+
+        ruta_parcial = os.path.join(ruta_particion(año), os.path.basename(ruta))
+        huella = huella_particion(año)
+
+        if tabla_vigente(ruta_parcial, huella):
+            partes.append(feather.read_feather(ruta_parcial))
+        else:
+            parcial = construir(leer_particion(año))
+            guardar_tabla(parcial, ruta_parcial, huella)
+            partes.append(parcial)
+
+    # Si ninguno de los años está disponible, regresamos una tabla vacía.
+    if len(partes) == 0:
+        return tabla_vacia(construir)
+
+    return pd.concat(partes, ignore_index=True)
+
+
+def tabla_vigente(ruta, huella):
+    """
+    Determina si una tabla guardada fue creada con la huella indicada.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta de la tabla.
+
+    huella : dict
+        La huella actual de los datos de origen.
+
+    Returns
+    -------
+    bool
+        True si la tabla puede usarse, False si debe volver a crearse.
+
+    """
+
+    guardada = leer_huella(ruta)
+
+    if not os.path.exists(ruta) or guardada is None:
+        return False
+
+    # El origen solo sirve para no volver a calcular el hash, la tabla
+    # sigue vigente aunque el archivo haya cambiado de fecha.
+    origen = guardada.pop("origen", None)
+
+    if guardada != {
+        clave: valor for clave, valor in huella.items() if clave != "origen"
+    }:
+        return False
+
+    # Si el archivo cambió de fecha pero no de contenido, actualizamos
+    # el origen de la huella para no volver a calcular el hash.
+    if "origen" in huella and origen != huella["origen"]:
+        with open(f"{ruta}.json", "w", encoding="utf-8") as archivo:
+            json.dump(huella, archivo)
+
+    return True
+
+
+def leer_huella(ruta):
+    """
+    Lee la huella guardada junto a una tabla.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta de la tabla.
+
+    Returns
+    -------
+    dict
+        La huella, o None si la tabla no tiene huella.
+
+    """
+
+    ruta_huella = f"{ruta}.json"
+
+    if not os.path.exists(ruta_huella):
+        return None
+
+    with open(ruta_huella, "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def guardar_tabla(tabla, ruta, huella):
+    """
+    Guarda una tabla de agregados junto con la huella de sus datos de origen.
+
+    Parameters
+    ----------
+    tabla : pandas.DataFrame
+        La tabla de agregados.
+
+    ruta : str
+        La ruta donde se guarda la tabla.
+
+    huella : dict
+        La huella de los datos de origen.
+
+    """
+
+    temporal = f"{ruta}.tmp"
+    tabla.to_feather(temporal)
+    os.replace(temporal, ruta)
+
+    with open(f"{ruta}.json", "w", encoding="utf-8") as archivo:
+        json.dump(huella, archivo)
+
+
+def huella_particion(año):
+    """
+    Calcula la huella de un año del dataset particionado.
+
+    Parameters
+    ----------
+    año : int
+        El año de registro.
+
+    Returns
+    -------
+    dict
+        El tamaño y fecha de modificación de sus registros, el esquema
+        y la versión de las tablas de agregados.
+
+    """
+
+    info = os.stat(os.path.join(ruta_particion(año), "datos.feather"))
+
+    return {
+        "tamaño": info.st_size,
+        "modificado": info.st_mtime_ns,
+        "esquema": describir_esquema(),
+        "version": VERSION_CUBO,
+    }
+
+
+def ingresar_año(ruta):
+    """
+    Agrega un año nuevo de microdatos de la EMAT al dataset particionado.
+
+    Solo se guardan los registros y se crean las tablas parciales de ese
+    año, los demás años no se vuelven a procesar. Si el año ya existía,
+    sus registros se reemplazan. Si el dataset aún no está particionado
+    y existe data.csv, primero se particiona para conservar sus años.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta del archivo CSV con los microdatos del año.
+
+    Returns
+    -------
+    int
+        El año que fue agregado.
+
+    Raises
+    ------
+    ValueError
+        Si el archivo no cumple con el esquema o contiene más de un año de registro.
+
+    """
+
+    df = leer_archivo(ruta)
+
+    años = df["ANIO_REGIS"].unique()
+
+    if len(años) != 1:
+        raise ValueError(
+            f"{ruta}: se esperaba un solo año de registro y se encontraron {len(años)}."
+        )
+
+    año = int(años[0])
+
+    # Una vez que hay años particionados ya no se lee data.csv,
+    # así que sus años deben estar en el dataset particionado.
+    if not años_particionados() and os.path.exists(RUTA_DATOS):
+        particionar_datos()
+
+    guardar_particion(df, año)
+    actualizar_particion(año, df)
+
+    return año
+
+
+def particionar_datos():
+    """
+    Crea el dataset particionado por año a partir de data.csv.
+
+    Returns
+    -------
+    list
+        Los años que fueron guardados.
+
+    """
+
+    años = list()
+
+    for año, df in cargar_datos().groupby("ANIO_REGIS"):
+        guardar_particion(df, año)
+        actualizar_particion(año, df)
+        años.append(int(año))
+
+    guardar_origen()
+
+    return años
+
+
+def actualizar_particion(año, df):
+    """
+    Crea las tablas parciales de agregados de un año.
+
+    Parameters
+    ----------
+    año : int
+        El año de registro.
+
+    df : pandas.DataFrame
+        Los registros del año.
+
+    """
+
+    huella = huella_particion(año)
+
+    for ruta, construir, _ in tablas_agregadas():
+        ruta_parcial = os.path.join(ruta_particion(año), os.path.basename(ruta))
+        guardar_tabla(construir(df), ruta_parcial, huella)
+
+    # Las tablas cargadas en memoria ya no corresponden al dataset.
+    _tablas.clear()
+
+
+def tablas_agregadas():
+    """
+    Regresa las tablas de agregados que se crean a partir del dataset.
+
+    Returns
+    -------
+    list
+        Una tupla por tabla con su ruta, la función que la crea
+        y las columnas por las que se agrupa.
+
+    """
+
+    return [
+        (RUTA_CUBO, construir_cubo, DIMENSIONES),
+        (RUTA_HISTOGRAMA, construir_histograma, DIMENSIONES_HISTOGRAMA),
+    ]
+
+
+def construir_por_bloques():
+    """
+    Crea todas las tablas de agregados leyendo el dataset por bloques.
+
+    Cada bloque se lee una sola vez y se agrega para todas las tablas,
+    su resultado se suma al acumulado de cada una. Así la memoria utilizada
+    depende del tamaño del bloque y no del dataset.
+
+    Returns
+    -------
+    dict
+        La ruta de cada tabla y la tabla de agregados.
+
+    """
+
+    tablas = dict()
+
+    for bloque in leer_por_bloques():
+        for ruta, construir, dimensiones in tablas_agregadas():
+            parcial = construir(bloque)
+
+            if ruta in tablas:
+                parcial = (
+                    pd.concat([tablas[ruta], parcial])
+                    .groupby(dimensiones, observed=True, sort=True)
+                    .sum()
+                    .reset_index()
+                )
+
+            tablas[ruta] = parcial
+
+    # Si el dataset no tiene registros creamos las tablas vacías.
+    if not tablas:
+        tablas = {
+            ruta: tabla_vacia(construir) for ruta, construir, _ in tablas_agregadas()
+        }
+
+    return tablas
+
+
+def tabla_vacia(construir):
+    """
+    Crea una tabla de agregados sin filas, con las columnas y tipos
+    que tendría a partir del dataset.
+
+    Parameters
+    ----------
+    construir : callable
+        La función que crea la tabla a partir del dataset.
+
+    Returns
+    -------
+    pandas.DataFrame
+        La tabla vacía.
+
+    """
+
+    vacio = pd.DataFrame(
+        {columna: pd.Series(dtype=tipo) for columna, tipo in ESQUEMA.items()}
+    )
+
+    return construir(vacio)
+
+
+def construir_cubo(df):
+    """
+    Agrega los registros del dataset en una sola pasada.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        El dataset de nupcialidad.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con las columnas de DIMENSIONES y los siguientes agregados:
+        total (número de registros), validos (registros donde ambas edades son
+        distintas de 99) y las sumas y sumas de cuadrados de EDAD_CON1 y EDAD_CON2
+        sobre los registros válidos.
+
+    """
+
+    # Las edades con valor 99 son registros no especificados.
+    validos = (df["EDAD_CON1"] != 99) & (df["EDAD_CON2"] != 99)
+
+    # Convertimos a enteros de 64 bits para que las sumas no se desborden.
+    edad1 = np.where(validos, df["EDAD_CON1"], 0).astype(np.int64)
+    edad2 = np.where(validos, df["EDAD_CON2"], 0).astype(np.int64)
+
+    agregados = df[DIMENSIONES].assign(
+        total=1,
+        validos=validos.astype(np.int64),
+        suma_edad1=edad1,
+        suma_edad2=edad2,
+        suma2_edad1=edad1**2,
+        suma2_edad2=edad2**2,
+    )
+
+    return agregados.groupby(DIMENSIONES, observed=True, sort=True).sum().reset_index()
+
+
+def construir_histograma(df):
+    """
+    Cuenta las edades de cada contrayente por año y tipo de pareja.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        El dataset de nupcialidad.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con las columnas ANIO_REGIS, SEXO_CON1, SEXO_CON2,
+        CONTRAYENTE (1 o 2), EDAD y total. Solo se consideran los registros
+        donde ambas edades son distintas de 99.
+
+    """
+
+    df = df[(df["EDAD_CON1"] != 99) & (df["EDAD_CON2"] != 99)]
+
+    # Apilamos las edades de ambos contrayentes para contarlas en una sola agrupación.
+    df = pd.DataFrame(
+        {
+            "ANIO_REGIS": np.tile(df["ANIO_REGIS"], 2),
+            "SEXO_CON1": np.tile(df["SEXO_CON1"], 2),
+            "SEXO_CON2": np.tile(df["SEXO_CON2"], 2),
+            "CONTRAYENTE": np.repeat(np.array([1, 2], dtype=np.uint8), len(df)),
+            "EDAD": np.concatenate([df["EDAD_CON1"], df["EDAD_CON2"]]),
+        }
+    )
+
+    return df.groupby(DIMENSIONES_HISTOGRAMA).size().to_frame("total").reset_index()
+
+
+@medir
+def edades_por_año(sexo, cuantiles=(0.25, 0.5, 0.75)):
+    """
+    Calcula la edad promedio y los percentiles de edad por año
+    para matrimonios del sexo opuesto y del mismo sexo.
+
+    Parameters
+    ----------
+    sexo : int
+        El sexo de los contrayentes que nos interesa (1 hombres, 2 mujeres).
+
+    cuantiles : tuple
+        Los cuantiles que se desean calcular, entre 0 y 1.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con una fila por año y tipo de matrimonio ('opuesto' o
+        'igualitario') y las columnas registros (personas consideradas), media
+        y un percentil por cada cuantil (p25, p50, p75, etc.). Los percentiles
+        son la menor edad cuya frecuencia acumulada alcanza el cuantil.
+
+    """
+
+    etapa("carga")
+
+    df = cargar_histograma()
+
+    etapa("transformacion")
+
+    # En matrimonios del sexo opuesto solo consideramos al contrayente del sexo
+    # que nos interesa (el primero es el hombre y el segundo la mujer).
+    opuesto = df[
+        (df["SEXO_CON1"] == 1) & (df["SEXO_CON2"] == 2) & (df["CONTRAYENTE"] == sexo)
+    ]
+
+    # En matrimonios del mismo sexo tomamos las edades de ambos contrayentes.
+    igualitario = df[(df["SEXO_CON1"] == sexo) & (df["SEXO_CON2"] == sexo)]
+
+    df = pd.concat(
+        [opuesto.assign(tipo="opuesto"), igualitario.assign(tipo="igualitario")]
+    )
+
+    # Creamos una matriz de (año, tipo) x edad con el número de personas.
+    matriz = df.pivot_table(
+        index=["ANIO_REGIS", "tipo"],
+        columns="EDAD",
+        values="total",
+        aggfunc="sum",
+        fill_value=0,
+    )
+
+    edades = matriz.columns.to_numpy(dtype=np.int64)
+    conteos = matriz.to_numpy(dtype=np.int64)
+
+    registros = conteos.sum(axis=1)
+    acumulado = conteos.cumsum(axis=1)
+
+    resultado = pd.DataFrame(
+        {"registros": registros, "media": conteos @ edades / registros},
+        index=matriz.index,
+    )
+
+    for cuantil in cuantiles:
+        posicion = (acumulado >= cuantil * registros[:, None]).argmax(axis=1)
+        resultado[f"p{cuantil * 100:g}"] = edades[posicion]
+
+    resultado.index.names = ["año", "tipo"]
+
+    return resultado.reset_index()
+
+
+@medir
+def residencia_por_entidad(año, entidad):
+    """
+    Calcula la entidad de residencia de los contrayentes del mismo sexo
+    que registraron su matrimonio en una entidad.
+
+    Parameters
+    ----------
+    año : int
+        El año que nos interesa analizar.
+
+    entidad : int
+        La clave de la entidad de registro.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con la clave de la entidad de residencia (residencia), el
+        número de contrayentes (total) y su porcentaje (perc), de mayor a menor.
+
+    """
+
+    df = residencia_por_registro([año])
+
+    # Limitamos por entidad de registro.
+    df = df[df["entidad"] == entidad]
+
+    return df.drop(columns="entidad").reset_index(drop=True)
+
+
+@medir
+def residencia_por_registro(años=None):
+    """
+    Calcula la entidad de residencia de los contrayentes del mismo sexo
+    para todas las entidades de registro a la vez.
+
+    Parameters
+    ----------
+    años : list
+        Los años que nos interesan. Si es None se usan todos.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con la clave de la entidad de registro (entidad), la de
+        residencia (residencia), el número de contrayentes (total) y su porcentaje
+        dentro de la entidad de registro (perc). Cada entidad de registro está
+        ordenada de mayor a menor.
+
+    """
+
+    etapa("carga")
+
+    # Cargamos el cubo de agregados de los años de nuestro interés.
+    df = cargar_cubo(años)
+
+    etapa("transformacion")
+
+    # Seleccionamos solo matrimonios del mismo sexo.
+    df = df[df["SEXO_CON1"] == df["SEXO_CON2"]]
+
+    # Apilamos los datos de residencia de ambos contrayentes
+    # para calcular todas las entidades en una sola agrupación.
+    df = pd.concat(
+        [
+            df[["ENT_REGIS", columna, "total"]].rename(columns={columna: "ENTRH"})
+            for columna in ["ENTRH_CON1", "ENTRH_CON2"]
+        ]
+    )
+
+    df = (
+        df.groupby(["ENT_REGIS", "ENTRH"], observed=True)["total"]
+        .sum()
+        .rename_axis(["entidad", "residencia"])
+        .reset_index()
+        .astype({"entidad": int, "residencia": int})
+    )
+
+    # Calculamos la frecuencia de registros y sus porcentajes.
+    df = df.sort_values(["entidad", "total"], ascending=[True, False], kind="stable")
+    df["perc"] = df["total"] / df.groupby("entidad")["total"].transform("sum") * 100
+
+    return df.reset_index(drop=True)
+
+
+@medir
+def tasas_por_sexo():
+    """
+    Calcula los matrimonios entre parejas del mismo sexo por año y sexo,
+    junto con su tasa por cada 100,000 hombres o mujeres mayores de edad.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con una fila por año y sexo (1 hombres, 2 mujeres, 9 no
+        especificado) y las columnas total, poblacion, tasa y los límites del
+        intervalo exacto de la tasa (tasa_inf y tasa_sup). La población y las
+        tasas están vacías cuando el sexo no está especificado.
+
+    """
+
+    etapa("carga")
+
+    df = cargar_cubo()
+
+    etapa("transformacion")
+
+    # Seleccionamos matrimonios entre parejas del mismo sexo.
+    df = df[df["SEXO_CON1"] == df["SEXO_CON2"]]
+
+    df = (
+        df.groupby(["ANIO_REGIS", "SEXO_CON1"])["total"]
+        .sum()
+        .rename_axis(["año", "sexo"])
+        .reset_index()
+        .astype({"año": int, "sexo": int})
+    )
+
+    # Agregamos la población nacional de cada sexo y calculamos la tasa por cada 100,000.
+    df["poblacion"] = obtener_poblacion(df["año"], sexo=df["sexo"])
+    df["tasa"] = tasas(df["total"], df["año"], sexo=df["sexo"])
+
+    inferior, superior = intervalo_exacto(df["total"])
+    df["tasa_inf"] = tasas(inferior, df["año"], sexo=df["sexo"])
+    df["tasa_sup"] = tasas(superior, df["año"], sexo=df["sexo"])
+
+    return df
+
+
+@medir
+def tasas_por_año(mismo_sexo):
+    """
+    Calcula los matrimonios por año y su tasa por cada 100,000 habitantes
+    mayores de edad.
+
+    Parameters
+    ----------
+    mismo_sexo : bool
+        Si es True se cuentan los matrimonios entre parejas del mismo sexo,
+        si es False los matrimonios entre parejas del sexo opuesto.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con una fila por año y las columnas total, poblacion, tasa
+        y cambio_anual (el cambio porcentual de registros contra el año anterior).
+
+    """
+
+    etapa("carga")
+
+    df = cargar_cubo()
+
+    etapa("transformacion")
+
+    if mismo_sexo:
+        df = df[df["SEXO_CON1"] == df["SEXO_CON2"]]
+    else:
+        df = df[df["SEXO_CON1"] != df["SEXO_CON2"]]
+
+    # Calculamos los registros por año.
+    df = df.groupby("ANIO_REGIS")["total"].sum().sort_index().to_frame("total")
+    df.index = df.index.astype(int).rename("año")
+
+    # Agregamos la población y calculamos la tasa por cada 100,000 habitantes.
+    df["poblacion"] = obtener_poblacion(df.index)
+    df["tasa"] = tasas(df["total"], df.index)
+
+    df["cambio_anual"] = df["total"].pct_change() * 100
+
+    return df.reset_index()
+
+
+@medir
+def tasas_por_entidad(años=None):
+    """
+    Calcula los matrimonios entre parejas del mismo sexo por año y entidad
+    de registro, junto con su tasa por cada 100,000 habitantes mayores de edad.
+
+    Parameters
+    ----------
+    años : list
+        Los años que nos interesan. Si es None se usan todos.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con una fila por año y entidad (0 para el total nacional)
+        y las columnas hombres, mujeres, total, poblacion, tasa y los límites del
+        intervalo exacto de la tasa (tasa_inf y tasa_sup). Las entidades sin
+        registros aparecen con ceros.
+
+    """
+
+    etapa("carga")
+
+    # Cargamos el cubo de agregados de los años de nuestro interés.
+    df = cargar_cubo(años)
+
+    etapa("transformacion")
+
+    if años is None:
+        años = sorted(df["ANIO_REGIS"].unique().tolist())
+
+    # Filtramos por matrimonios del mismo sexo.
+    df = df[df["SEXO_CON1"] == df["SEXO_CON2"]]
+
+    # Calculamos los registros por año, entidad y sexo en una sola agrupación.
+    df = (
+        df.groupby(["ANIO_REGIS", "ENT_REGIS", "SEXO_CON1"], observed=True)["total"]
+        .sum()
+        .unstack("SEXO_CON1")
+        .reindex(columns=[1, 2])
+        .rename(columns={1: "hombres", 2: "mujeres"})
+        .rename_axis(index=["año", "entidad"], columns=None)
+        .reset_index()
+        .astype({"año": int, "entidad": int})
+        .set_index(["año", "entidad"])
+    )
+
+    # Hay estados sin registros, lo cual puede causar ambigüedad.
+    # Agregamos todas las entidades con valores en cero para arreglar esto.
+    df = df.reindex(
+        pd.MultiIndex.from_product(
+            [años, list(ENTIDADES.keys())], names=["año", "entidad"]
+        )
+    ).fillna(0)
+
+    # Agregamos el total nacional de cada año como la entidad 0.
+    nacional = pd.concat({0: df.groupby(level="año").sum()}, names=["entidad"])
+    nacional = nacional.swaplevel()
+
+    df = pd.concat([df, nacional]).reindex(
+        pd.MultiIndex.from_product(
+            [años, [0] + list(ENTIDADES.keys())], names=["año", "entidad"]
+        )
+    )
+
+    df = df.reset_index()
+
+    # Calculamos la tasa de todos los años y entidades a la vez.
+    df["total"] = df["hombres"] + df["mujeres"]
+    df["poblacion"] = obtener_poblacion(df["año"], df["entidad"])
+    df["tasa"] = tasas(df["total"], df["año"], df["entidad"])
+
+    inferior, superior = intervalo_exacto(df["total"])
+    df["tasa_inf"] = tasas(inferior, df["año"], df["entidad"])
+    df["tasa_sup"] = tasas(superior, df["año"], df["entidad"])
+
+    return df
+
+
+@medir
+def intervalos_por_entidad(años=None, replicas=0, procesos=None, nivel=NIVEL):
+    """
+    Calcula los intervalos de las tasas de matrimonio igualitario de todos
+    los años, entidades y tipos de pareja a la vez.
+
+    Parameters
+    ----------
+    años : list
+        Los años que nos interesan. Si es None se usan todos.
+
+    replicas : int
+        El número de réplicas del bootstrap paramétrico. Si es 0 solo se
+        calcula el intervalo exacto.
+
+    procesos : int
+        El número de procesos para el bootstrap. Por defecto se usa uno por núcleo.
+
+    nivel : float
+        El nivel de confianza, entre 0 y 1.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame con una fila por año, entidad (0 para el total nacional)
+        y tipo de pareja ('hombres', 'mujeres' o 'total') y las columnas total,
+        poblacion, tasa, tasa_inf y tasa_sup. Con réplicas se agregan los
+        límites del bootstrap (boot_inf y boot_sup). Las tasas de hombres y de
+        mujeres usan la población adulta de su sexo.
+
+    """
+
+    df = tasas_por_entidad(años)
+
+    etapa("intervalos")
+
+    # La clave de sexo de la población de cada tipo de pareja.
+    tipos = {"hombres": 1, "mujeres": 2, "total": 0}
+
+    # Una matriz de (año y entidad, tipo) con todas las celdas.
+    conteos = df[list(tipos)].to_numpy(dtype=np.float64)
+
+    año = df["año"].to_numpy()[:, None]
+    entidad = df["entidad"].to_numpy()[:, None]
+    sexo = np.array(list(tipos.values()))
+
+    columnas = {
+        "total": conteos,
+        "poblacion": obtener_poblacion(año, entidad, sexo),
+        "tasa": tasas(conteos, año, entidad, sexo),
+    }
+
+    inferior, superior = intervalo_exacto(conteos, nivel)
+    columnas["tasa_inf"] = tasas(inferior, año, entidad, sexo)
+    columnas["tasa_sup"] = tasas(superior, año, entidad, sexo)
+
+    if replicas:
+        inferior, superior = intervalo_bootstrap(
+            conteos, replicas, nivel, procesos=procesos
+        )
+        columnas["boot_inf"] = tasas(inferior, año, entidad, sexo)
+        columnas["boot_sup"] = tasas(superior, año, entidad, sexo)
+
+    return pd.DataFrame(
+        {
+            "año": np.repeat(df["año"].to_numpy(), len(tipos)),
+            "entidad": np.repeat(df["entidad"].to_numpy(), len(tipos)),
+            "tipo": np.tile(list(tipos), len(df)),
+            **{nombre: valores.ravel() for nombre, valores in columnas.items()},
+        }
+    )
@@ -0,0 +1,494 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+from pyarrow import feather
+
+
+# Ruta del dataset de nupcialidad.
+RUTA_DATOS = "./data.csv"
+
+# Rutas de la copia en formato columnar (Feather) y de la huella
+# del archivo original con la que fue creada.
+RUTA_CACHE = "./data.feather"
+RUTA_HUELLA = "./data.feather.json"
+
+# Las únicas columnas que utilizan nuestras gráficas y sus tipos de datos.
+# Todos los valores caben en enteros de 8 o 16 bits: sexo (1 y 2), edad (hasta 99),
+# entidad (1 a 32, con claves extra para el extranjero y no especificado en la
+# entidad de residencia) y año de registro.
+ESQUEMA = {
+    "ANIO_REGIS": "uint16",
+    "ENT_REGIS": pd.CategoricalDtype(categories=range(1, 33)),
+    "SEXO_CON1": "uint8",
+    "SEXO_CON2": "uint8",
+    "EDAD_CON1": "uint8",
+    "EDAD_CON2": "uint8",
+    "ENTRH_CON1": "uint8",
+    "ENTRH_CON2": "uint8",
+}
+
+COLUMNAS = list(ESQUEMA.keys())
+
+# Los valores permitidos de cada columna, usados para validar archivos nuevos.
+RANGOS = {
+    "ANIO_REGIS": (1900, 2100),
+    "ENT_REGIS": (1, 32),
+    "SEXO_CON1": (1, 9),
+    "SEXO_CON2": (1, 9),
+    "EDAD_CON1": (0, 99),
+    "EDAD_CON2": (0, 99),
+    "ENTRH_CON1": (1, 99),
+    "ENTRH_CON2": (1, 99),
+}
+
+# Carpeta del dataset particionado por año de registro. Cada año se guarda
+# en su propia subcarpeta junto con sus tablas de agregados.
+RUTA_PARTICIONES = "./particiones"
+
+# El tamaño y fecha de modificación de data.csv cuando se creó el dataset
+# particionado. Los cambios posteriores a data.csv ya no se leen.
+RUTA_ORIGEN = os.path.join(RUTA_PARTICIONES, "origen.json")
+
+# Si se define la variable de entorno POR_BLOQUES=1, las tablas de agregados
+# se crean leyendo el dataset por bloques en lugar de cargarlo completo.
+POR_BLOQUES = os.environ.get("POR_BLOQUES") == "1"
+
+# El número de registros de cada bloque.
+TAMAÑO_BLOQUE = 1_000_000
+
+# Aquí guardaremos el dataset una vez que haya sido cargado.
+_datos = None
+
+
+def cargar_datos():
+    """
+    Carga el dataset de nupcialidad.
+
+    El archivo se lee solo la primera vez que se llama esta función,
+    las siguientes llamadas reutilizan el DataFrame ya cargado.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una vista del DataFrame compartido. Las funciones que la reciben
+        solo deben derivar nuevos DataFrames a partir de ella (filtros,
+        agrupaciones, etc.) y nunca modificarla directamente.
+
+    """
+
+    global _datos
+
+    if _datos is None:
+        _datos = leer_datos()
+
+    # Regresamos una copia superficial para que cada gráfica trabaje
+    # sobre su propio objeto sin duplicar los datos en memoria.
+    return _datos.copy(deep=False)
+
+
+def leer_datos():
+    """
+    Lee el dataset desde la copia en formato Feather.
+
+    Si la copia no existe o ya no corresponde al archivo CSV original
+    se vuelve a crear a partir de este.
+
+    Returns
+    -------
+    pandas.DataFrame
+        El dataset con las columnas y tipos definidos en ESQUEMA.
+
+    """
+
+    if cache_vigente():
+        return feather.read_feather(RUTA_CACHE, memory_map=True)
+
+    df = pd.read_csv(RUTA_DATOS, usecols=COLUMNAS, dtype=ESQUEMA)
+    guardar_cache(df)
+
+    return df
+
+
+def leer_por_bloques(tamaño=TAMAÑO_BLOQUE):
+    """
+    Lee el dataset por bloques, sin cargarlo completo en memoria.
+
+    Si la copia en formato Feather está vigente se lee de ella con memory
+    mapping, de lo contrario se lee el archivo CSV original.
+
+    Parameters
+    ----------
+    tamaño : int
+        El número de registros de cada bloque.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Un bloque del dataset con las columnas y tipos definidos en ESQUEMA.
+
+    """
+
+    if cache_vigente():
+        tabla = feather.read_table(RUTA_CACHE, memory_map=True)
+
+        for lote in tabla.to_batches(max_chunksize=tamaño):
+            yield lote.to_pandas()
+
+        return
+
+    yield from pd.read_csv(
+        RUTA_DATOS, usecols=COLUMNAS, dtype=ESQUEMA, chunksize=tamaño
+    )
+
+
+def leer_archivo(ruta):
+    """
+    Lee y valida un archivo CSV con microdatos de la EMAT.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta del archivo CSV.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Los registros con las columnas y tipos definidos en ESQUEMA.
+
+    Raises
+    ------
+    ValueError
+        Si faltan columnas, hay valores vacíos o valores fuera de RANGOS.
+
+    """
+
+    df = pd.read_csv(ruta, usecols=lambda columna: columna in ESQUEMA)
+
+    faltantes = [columna for columna in COLUMNAS if columna not in df.columns]
+
+    if faltantes:
+        raise ValueError(f"{ruta}: faltan las columnas {', '.join(faltantes)}.")
+
+    for columna, (minimo, maximo) in RANGOS.items():
+        if df[columna].isna().any():
+            raise ValueError(f"{ruta}: la columna {columna} tiene valores vacíos.")
+
+        invalidos = df[(df[columna] < minimo) | (df[columna] > maximo)]
+
+        if len(invalidos) > 0:
+            raise ValueError(
+                f"{ruta}: la columna {columna} tiene {len(invalidos):,} valores "
+                f"fuera del rango {minimo}-{maximo}."
+            )
+
+    return df[COLUMNAS].astype(ESQUEMA)
+
+
+def ruta_particion(año):
+    """
+    Regresa la carpeta donde se guarda un año del dataset particionado.
+
+    Parameters
+    ----------
+    año : int
+        El año de registro.
+
+    Returns
+    -------
+    str
+        La ruta de la carpeta.
+
+    """
+
+    return os.path.join(RUTA_PARTICIONES, f"ANIO_REGIS={año}")
+
+
+def años_particionados():
+    """
+    Regresa los años disponibles en el dataset particionado.
+
+    Returns
+    -------
+    list
+        Los años ordenados de menor a mayor. La lista está vacía
+        si el dataset no ha sido particionado.
+
+    """
+
+    if not os.path.isdir(RUTA_PARTICIONES):
+        return list()
+
+    años = list()
+
+    for nombre in os.listdir(RUTA_PARTICIONES):
+        if nombre.startswith("ANIO_REGIS="):
+            años.append(int(nombre.split("=")[1]))
+
+    return sorted(
+        año
+        for año in años
+        if os.path.exists(os.path.join(ruta_particion(año), "datos.feather"))
+    )
+
+
+def guardar_particion(df, año):
+    """
+    Guarda los registros de un año en el dataset particionado,
+    reemplazando los que existieran de ese año.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Los registros del año, con las columnas y tipos definidos en ESQUEMA.
+
+    año : int
+        El año de registro.
+
+    """
+
+    carpeta = ruta_particion(año)
+    os.makedirs(carpeta, exist_ok=True)
+
+    ruta = os.path.join(carpeta, "datos.feather")
+    temporal = f"{ruta}.tmp"
+
+    df.reset_index(drop=True).to_feather(temporal, compression="uncompressed")
+    os.replace(temporal, ruta)
+
+
+def leer_particion(año):
+    """
+    Lee los registros de un año del dataset particionado.
+
+    Parameters
+    ----------
+    año : int
+        El año de registro.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Los registros del año.
+
+    """
+
+    ruta = os.path.join(ruta_particion(año), "datos.feather")
+
+    return feather.read_feather(ruta, memory_map=True)
+
+
+def guardar_origen():
+    """
+    Guarda el tamaño y fecha de modificación de data.csv junto al dataset
+    particionado, para detectar después si el archivo cambió.
+    """
+
+    info = os.stat(RUTA_DATOS)
+    os.makedirs(RUTA_PARTICIONES, exist_ok=True)
+
+    with open(RUTA_ORIGEN, "w", encoding="utf-8") as archivo:
+        json.dump({"tamaño": info.st_size, "modificado": info.st_mtime_ns}, archivo)
+
+
+def origen_vigente():
+    """
+    Determina si data.csv sigue igual que cuando se creó el dataset particionado.
+
+    Returns
+    -------
+    bool
+        False si data.csv cambió después de particionarlo, True en otro caso
+        (incluso si el dataset particionado no se creó a partir de data.csv).
+
+    """
+
+    if not os.path.exists(RUTA_ORIGEN) or not os.path.exists(RUTA_DATOS):
+        return True
+
+    with open(RUTA_ORIGEN, "r", encoding="utf-8") as archivo:
+        guardado = json.load(archivo)
+
+    info = os.stat(RUTA_DATOS)
+
+    return guardado == {"tamaño": info.st_size, "modificado": info.st_mtime_ns}
+
+
+def guardar_cache(df):
+    """
+    Guarda el dataset en formato Feather junto con la huella
+    del archivo CSV original.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        El dataset que se desea guardar.
+
+    """
+
+    # Guardamos sin compresión para poder leer el archivo con memory mapping.
+    # Escribimos primero a un archivo temporal para nunca dejar una copia a medias.
+    temporal = f"{RUTA_CACHE}.tmp"
+    df.reset_index(drop=True).to_feather(temporal, compression="uncompressed")
+    os.replace(temporal, RUTA_CACHE)
+
+    with open(RUTA_HUELLA, "w", encoding="utf-8") as archivo:
+        json.dump(huella_archivo(RUTA_DATOS), archivo)
+
+
+def cache_vigente():
+    """
+    Determina si la copia en formato Feather corresponde al archivo CSV actual.
+
+    Returns
+    -------
+    bool
+        True si la copia puede usarse, False si debe volver a crearse.
+
+    """
+
+    if not os.path.exists(RUTA_CACHE) or not os.path.exists(RUTA_HUELLA):
+        return False
+
+    with open(RUTA_HUELLA, "r", encoding="utf-8") as archivo:
+        guardada = json.load(archivo)
+
+    # Si cambiaron las columnas o tipos que usamos, la copia ya no sirve.
+    if guardada.get("esquema") != describir_esquema():
+        return False
+
+    # Sin el archivo original no podemos saber si la copia le corresponde.
+    if not os.path.exists(RUTA_DATOS):
+        return False
+
+    info = os.stat(RUTA_DATOS)
+
+    if info.st_size != guardada["tamaño"]:
+        return False
+
+    if info.st_mtime_ns == guardada["modificado"]:
+        return True
+
+    # El archivo fue modificado pero tiene el mismo tamaño, comparamos su contenido.
+    # Si es el mismo, actualizamos la huella para no volver a calcularlo.
+    if calcular_hash(RUTA_DATOS) != guardada["hash"]:
+        return False
+
+    guardada["modificado"] = info.st_mtime_ns
+
+    with open(RUTA_HUELLA, "w", encoding="utf-8") as archivo:
+        json.dump(guardada, archivo)
+
+    return True
+
+
+def huella_datos(conocida=None):
+    """
+    Regresa la huella del dataset sin necesidad de cargarlo.
+
+    Parameters
+    ----------
+    conocida : dict
+        Una huella calculada anteriormente del archivo CSV. Si el archivo
+        conserva su tamaño y fecha de modificación se reutiliza sin volver
+        a calcular el hash.
+
+    Returns
+    -------
+    dict
+        La huella guardada si la copia en formato Feather está vigente,
+        de lo contrario la huella del archivo CSV original.
+
+    """
+
+    if not cache_vigente():
+        info = os.stat(RUTA_DATOS)
+
+        if (
+            conocida is not None
+            and conocida.get("tamaño") == info.st_size
+            and conocida.get("modificado") == info.st_mtime_ns
+            and conocida.get("esquema") == describir_esquema()
+        ):
+            return conocida
+
+        return huella_archivo(RUTA_DATOS)
+
+    with open(RUTA_HUELLA, "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def huella_archivo(ruta):
+    """
+    Calcula la huella de un archivo: tamaño, fecha de modificación y hash.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta del archivo.
+
+    Returns
+    -------
+    dict
+        La huella del archivo y el esquema con el que se creó la copia.
+
+    """
+
+    info = os.stat(ruta)
+
+    return {
+        "tamaño": info.st_size,
+        "modificado": info.st_mtime_ns,
+        "hash": calcular_hash(ruta),
+        "esquema": describir_esquema(),
+    }
+
+
+def describir_esquema():
+    """
+    Convierte ESQUEMA a un diccionario de textos que puede guardarse en JSON.
+
+    Returns
+    -------
+    dict
+        El nombre de cada columna y la descripción de su tipo de datos.
+
+    """
+
+    descripcion = dict()
+
+    for columna, tipo in ESQUEMA.items():
+        # En las columnas categóricas también guardamos sus categorías.
+        if isinstance(tipo, pd.CategoricalDtype):
+            descripcion[columna] = f"category{list(tipo.categories)}"
+        else:
+            descripcion[columna] = str(tipo)
+
+    return descripcion
+
+
+def calcular_hash(ruta):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta del archivo.
+
+    Returns
+    -------
+    str
+        El hash en formato hexadecimal.
+
+    """
+
+    sha = hashlib.sha256()
+
+    with open(ruta, "rb") as archivo:
+        # Leemos en bloques de 1 MB para no cargar todo el archivo en memoria.
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            sha.update(bloque)
+
+    return sha.hexdigest()
@@ -0,0 +1,983 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from importlib import metadata
+
+from instrumentacion import etapa, medir
+
+
+# Plotly, Kaleido y PIL se importan dentro de las funciones que los usan,
+# así importar este módulo no carga el stack de renderizado.
+
+# Los formatos en los que se puede exportar una imagen. Los formatos raster
+# salen de un solo renderizado de Kaleido, el SVG requiere un renderizado
+# aparte y el HTML interactivo no necesita Kaleido.
+FORMATOS_RASTER = ["png", "webp", "avif"]
+FORMATOS_VALIDOS = FORMATOS_RASTER + ["svg", "html"]
+
+# Los formatos de video de las figuras animadas, que se crean además
+# de su HTML interactivo, la duración en milisegundos de cada cuadro y
+# el alto en pixeles que se agrega al HTML para los controles.
+FORMATOS_ANIMACION = ["gif", "mp4"]
+DURACION_CUADRO = 1000
+ALTO_CONTROLES = 100
+
+# Las opciones de Pillow para codificar cada formato raster.
+OPCIONES_PILLOW = {
+    "png": {},
+    "webp": {"quality": 90, "method": 6},
+    "avif": {"quality": 80},
+}
+
+# Los formatos que se crean de cada imagen, los anchos en pixeles de sus
+# miniaturas y si los PNG se reducen a una paleta de 256 colores.
+# Se modifican con configurar_salidas().
+FORMATOS = ["png"]
+MINIATURAS = []
+CUANTIZAR = False
+
+# Cuando estamos dentro de en_paralelo() aquí se acumulan las figuras
+# pendientes de exportar. Fuera de él las figuras se exportan de inmediato.
+_pendientes = None
+
+# En los procesos que renderizan los cuadros de una animación
+# aquí se guarda la figura base, que se recibe una sola vez.
+_figura_cuadros = None
+
+
+def exportar(figuras, ruta):
+    """
+    Exporta una o más figuras a una imagen en cada uno de los FORMATOS.
+
+    Parameters
+    ----------
+    figuras : dict, plotly.graph_objects.Figure or list
+        La figura que se desea exportar, de preferencia como diccionario
+        para no pasar por los validadores de Plotly. Si es una lista de
+        figuras, estas se apilan verticalmente en una sola imagen.
+
+    ruta : str
+        La ruta de la imagen final en PNG. Los demás formatos y las
+        miniaturas se guardan junto a ella con su propia extensión.
+
+    """
+
+    if not isinstance(figuras, list):
+        figuras = [figuras]
+
+    # Convertimos las figuras a diccionarios para poder enviarlas a otro proceso.
+    # Las que ya son diccionarios se usan tal cual, sin validarlas de nuevo.
+    figuras = [
+        figura if isinstance(figura, dict) else figura.to_dict() for figura in figuras
+    ]
+
+    huella = huella_figuras(figuras)
+
+    # Las salidas son parte de la huella, así cambiar de formato vuelve a exportar.
+    huella["salidas"] = {
+        "formatos": FORMATOS,
+        "miniaturas": MINIATURAS,
+        "cuantizar": CUANTIZAR,
+    }
+
+    # Si la imagen ya fue creada con las mismas figuras no hay nada que hacer.
+    if imagen_vigente(ruta, huella):
+        return
+
+    trabajo = (figuras, ruta, huella)
+
+    if _pendientes is None:
+        exportar_trabajo(trabajo)
+    else:
+        _pendientes.append(trabajo)
+
+
+@contextmanager
+def acumular():
+    """
+    Acumula las figuras exportadas dentro del bloque en lugar de exportarlas.
+
+    Yields
+    ------
+    list
+        La lista donde se agregan los trabajos pendientes, cada uno con sus
+        figuras (como diccionarios), la ruta de la imagen final y su huella.
+
+    """
+
+    global _pendientes
+
+    _pendientes = list()
+
+    try:
+        yield _pendientes
+    finally:
+        _pendientes = None
+
+
+@contextmanager
+def en_paralelo(procesos=None):
+    """
+    Acumula las figuras exportadas dentro del bloque y al final
+    las exporta de forma simultánea en varios procesos.
+
+    Parameters
+    ----------
+    procesos : int
+        El número de procesos a utilizar. Por defecto se usa uno por núcleo.
+
+    """
+
+    with acumular() as trabajos:
+        yield
+
+    # Si todas las imágenes están vigentes no iniciamos ningún proceso.
+    if not trabajos:
+        return
+
+    # Usamos 'spawn' para que cada proceso inicie su propia instancia de Kaleido.
+    with ProcessPoolExecutor(
+        max_workers=min(procesos or os.cpu_count(), len(trabajos)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=iniciar_kaleido if requiere_kaleido(FORMATOS) else None,
+    ) as pool:
+        list(pool.map(exportar_trabajo, trabajos))
+
+
+def configurar_salidas(formatos=None, miniaturas=None, cuantizar=None):
+    """
+    Cambia los formatos, las miniaturas y la optimización de las imágenes
+    que se exporten a partir de este momento.
+
+    Parameters
+    ----------
+    formatos : list
+        Los formatos de cada imagen (png, webp, avif, svg o html).
+
+    miniaturas : list
+        Los anchos en pixeles de las miniaturas de cada formato raster.
+
+    cuantizar : bool
+        Si es True los PNG se reducen a una paleta de 256 colores.
+
+    Raises
+    ------
+    ValueError
+        Si algún formato no es válido.
+
+    """
+
+    global FORMATOS, MINIATURAS, CUANTIZAR
+
+    if formatos is not None:
+        invalidos = sorted(set(formatos) - set(FORMATOS_VALIDOS))
+
+        if invalidos:
+            raise ValueError(f"Formatos no válidos: {', '.join(invalidos)}")
+
+        FORMATOS = list(formatos)
+
+    if miniaturas is not None:
+        MINIATURAS = sorted(set(miniaturas))
+
+    if cuantizar is not None:
+        CUANTIZAR = cuantizar
+
+
+def requiere_kaleido(formatos):
+    """
+    Determina si alguno de los formatos se crea con Kaleido.
+
+    Parameters
+    ----------
+    formatos : list
+        Los formatos de la imagen.
+
+    Returns
+    -------
+    bool
+        True si hay algún formato raster o SVG.
+
+    """
+
+    return any(formato != "html" for formato in formatos)
+
+
+def iniciar_kaleido():
+    """
+    Inicia Kaleido exportando una figura vacía, así cada proceso
+    lo deja listo antes de recibir su primera figura.
+    """
+
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    pio.to_image(go.Figure(), format="png", width=10, height=10)
+
+
+@medir
+def exportar_trabajo(trabajo):
+    """
+    Exporta las figuras de un trabajo y las une en una sola imagen
+    en cada uno de los formatos indicados en su huella.
+
+    Parameters
+    ----------
+    trabajo : tuple
+        Una lista de figuras (como diccionarios), la ruta de la imagen final
+        y la huella de las figuras.
+
+    """
+
+    figuras, ruta, huella = trabajo
+
+    salidas = huella["salidas"]
+    base, _ = os.path.splitext(ruta)
+
+    raster = [formato for formato in salidas["formatos"] if formato in FORMATOS_RASTER]
+
+    if raster:
+        etapa("kaleido")
+
+        partes = renderizar(figuras)
+
+        etapa("composicion")
+
+        guardar_imagen(
+            partes, ruta, raster, salidas["miniaturas"], salidas["cuantizar"]
+        )
+
+    if "svg" in salidas["formatos"]:
+        etapa("svg")
+
+        guardar_svg(figuras, f"{base}.svg")
+
+    if "html" in salidas["formatos"]:
+        etapa("html")
+
+        guardar_html(figuras, f"{base}.html")
+
+    # Guardamos la huella hasta que todas las salidas quedaron completas.
+    escribir_archivo(f"{ruta}.json", json.dumps(huella).encode("utf-8"))
+
+
+def huella_figuras(figuras):
+    """
+    Calcula la huella de las figuras de una imagen: el hash de su especificación
+    (que incluye los datos agregados) y las versiones de Plotly y Kaleido.
+
+    Parameters
+    ----------
+    figuras : list
+        Las figuras (como diccionarios) de la imagen.
+
+    Returns
+    -------
+    dict
+        La huella de las figuras.
+
+    """
+
+    from plotly.io.json import to_json_plotly
+
+    contenido = hashlib.sha256()
+
+    for figura in figuras:
+        contenido.update(to_json_plotly(figura).encode("utf-8"))
+
+    huella = {"sha256": contenido.hexdigest()}
+
+    for paquete in ["plotly", "kaleido"]:
+        try:
+            huella[paquete] = metadata.version(paquete)
+        except metadata.PackageNotFoundError:
+            huella[paquete] = None
+
+    return huella
+
+
+def imagen_vigente(ruta, huella):
+    """
+    Determina si una imagen ya fue creada con las figuras indicadas.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta de la imagen.
+
+    huella : dict
+        La huella de las figuras actuales.
+
+    Returns
+    -------
+    bool
+        True si la imagen puede usarse, False si debe volver a crearse.
+
+    """
+
+    ruta_huella = f"{ruta}.json"
+
+    rutas = [salida for salida, _, _ in rutas_salida(ruta, **huella["salidas"])]
+
+    if not all(os.path.exists(salida) for salida in rutas + [ruta_huella]):
+        return False
+
+    with open(ruta_huella, "r", encoding="utf-8") as archivo:
+        return json.load(archivo) == huella
+
+
+def rutas_salida(ruta, formatos, miniaturas, cuantizar=False):
+    """
+    Regresa los archivos que se crean al exportar una imagen.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta de la imagen final en PNG.
+
+    formatos : list
+        Los formatos de la imagen.
+
+    miniaturas : list
+        Los anchos en pixeles de las miniaturas de cada formato raster.
+
+    cuantizar : bool
+        No cambia las rutas, se acepta para poder pasar las salidas de la huella.
+
+    Returns
+    -------
+    list
+        La ruta, el formato y el ancho (None para el tamaño original) de cada archivo.
+
+    """
+
+    base, _ = os.path.splitext(ruta)
+
+    resultado = list()
+
+    for formato in formatos:
+        resultado.append((f"{base}.{formato}", formato, None))
+
+        if formato in FORMATOS_RASTER:
+            for ancho in miniaturas:
+                resultado.append((f"{base}.{ancho}px.{formato}", formato, ancho))
+
+    return resultado
+
+
+def renderizar(figuras):
+    """
+    Exporta las figuras a imágenes PNG en memoria usando Kaleido.
+
+    Parameters
+    ----------
+    figuras : list
+        Las figuras (como diccionarios) que se desean exportar.
+
+    Returns
+    -------
+    list
+        El contenido PNG de cada figura.
+
+    """
+
+    import plotly.io as pio
+
+    return [pio.to_image(figura, format="png", validate=False) for figura in figuras]
+
+
+def guardar_imagen(partes, ruta, formatos=("png",), miniaturas=(), cuantizar=False):
+    """
+    Guarda una imagen en uno o más formatos raster. Si hay más de una parte,
+    estas se apilan verticalmente en una sola imagen.
+
+    La imagen se compone una sola vez en memoria y cada formato y
+    miniatura se codifica en su propio hilo.
+
+    Parameters
+    ----------
+    partes : list
+        El contenido PNG de cada parte.
+
+    ruta : str
+        La ruta de la imagen final en PNG.
+
+    formatos : list
+        Los formatos raster (png, webp o avif) que se desean guardar.
+
+    miniaturas : list
+        Los anchos en pixeles de las miniaturas de cada formato.
+
+    cuantizar : bool
+        Si es True los PNG se reducen a una paleta de 256 colores.
+
+    """
+
+    salidas = rutas_salida(ruta, formatos, miniaturas)
+
+    # Si solo queremos el PNG de una figura usamos directamente el que creó Kaleido.
+    if len(partes) == 1 and salidas == [(ruta, "png", None)] and not cuantizar:
+        escribir_archivo(ruta, partes[0])
+        return
+
+    imagen = componer(partes)
+
+    def guardar(salida):
+        ruta_salida, formato, ancho = salida
+        escribir_archivo(ruta_salida, codificar(imagen, formato, ancho, cuantizar))
+
+    with ThreadPoolExecutor(max_workers=len(salidas)) as pool:
+        list(pool.map(guardar, salidas))
+
+
+def componer(partes):
+    """
+    Apila verticalmente las partes de una imagen.
+
+    Parameters
+    ----------
+    partes : list
+        El contenido PNG de cada parte.
+
+    Returns
+    -------
+    PIL.Image.Image
+        La imagen completa, ya cargada en memoria.
+
+    """
+
+    from PIL import Image
+
+    imagenes = [Image.open(io.BytesIO(parte)) for parte in partes]
+
+    if len(imagenes) == 1:
+        imagenes[0].load()
+        return imagenes[0]
+
+    result_width = max(imagen.width for imagen in imagenes)
+    result_height = sum(imagen.height for imagen in imagenes)
+
+    result = Image.new("RGB", (result_width, result_height))
+
+    altura = 0
+
+    for imagen in imagenes:
+        result.paste(im=imagen, box=(0, altura))
+        altura += imagen.height
+
+    return result
+
+
+def codificar(imagen, formato, ancho=None, cuantizar=False):
+    """
+    Codifica una imagen en un formato raster.
+
+    Parameters
+    ----------
+    imagen : PIL.Image.Image
+        La imagen completa.
+
+    formato : str
+        El formato de salida: png, webp o avif.
+
+    ancho : int
+        El ancho en pixeles de la miniatura. Si es None o no es menor
+        al ancho de la imagen se usa el tamaño original.
+
+    cuantizar : bool
+        Si es True y el formato es PNG, la imagen se reduce a una paleta de
+        256 colores. Nuestras gráficas usan pocos colores planos, así que
+        el archivo se reduce mucho sin diferencias visibles.
+
+    Returns
+    -------
+    bytes
+        El contenido del archivo.
+
+    """
+
+    from PIL import Image
+
+    if ancho is not None and ancho < imagen.width:
+        alto = round(imagen.height * ancho / imagen.width)
+        imagen = imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+
+    opciones = dict(OPCIONES_PILLOW[formato])
+
+    if formato == "png" and cuantizar:
+        imagen = imagen.quantize(
+            256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE
+        )
+        opciones["optimize"] = True
+
+    contenido = io.BytesIO()
+    imagen.save(contenido, format=formato.upper(), **opciones)
+
+    return contenido.getvalue()
+
+
+def guardar_svg(figuras, ruta):
+    """
+    Guarda las figuras en un archivo SVG. Si hay más de una figura,
+    estas se apilan verticalmente.
+
+    Parameters
+    ----------
+    figuras : list
+        Las figuras (como diccionarios) que se desean exportar.
+
+    ruta : str
+        La ruta del archivo SVG.
+
+    """
+
+    import plotly.io as pio
+
+    partes = [
+        pio.to_image(figura, format="svg", validate=False).decode("utf-8")
+        for figura in figuras
+    ]
+
+    if len(partes) == 1:
+        escribir_archivo(ruta, partes[0].encode("utf-8"))
+        return
+
+    # Anidamos cada SVG dentro de uno nuevo, recorriéndolo hacia abajo.
+    grupos = list()
+    ancho = 0
+    altura = 0
+
+    for parte in partes:
+        atributos = re.match(r"<svg[^>]*", parte).group(0)
+        ancho_parte = float(re.search(r'\bwidth="([\d.]+)"', atributos).group(1))
+        alto_parte = float(re.search(r'\bheight="([\d.]+)"', atributos).group(1))
+
+        grupos.append(f'<g transform="translate(0,{altura:g})">{parte}</g>')
+
+        ancho = max(ancho, ancho_parte)
+        altura += alto_parte
+
+    contenido = (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{ancho:g}" height="{altura:g}" viewBox="0 0 {ancho:g} {altura:g}">'
+        + "".join(grupos)
+        + "</svg>"
+    )
+
+    escribir_archivo(ruta, contenido.encode("utf-8"))
+
+
+def guardar_html(figuras, ruta):
+    """
+    Guarda las figuras en un archivo HTML interactivo que incluye
+    plotly.js, así funciona sin conexión.
+
+    Parameters
+    ----------
+    figuras : list
+        Las figuras (como diccionarios) que se desean exportar.
+
+    ruta : str
+        La ruta del archivo HTML.
+
+    """
+
+    import plotly.io as pio
+
+    # Solo la primera figura incluye plotly.js, las demás lo reutilizan.
+    divs = [
+        pio.to_html(figura, include_plotlyjs=i == 0, full_html=False, validate=False)
+        for i, figura in enumerate(figuras)
+    ]
+
+    contenido = (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8" />\n</head>\n<body>\n'
+        + "\n".join(divs)
+        + "\n</body>\n</html>\n"
+    )
+
+    escribir_archivo(ruta, contenido.encode("utf-8"))
+
+
+@medir
+def exportar_animacion(figura, ruta, videos=(), procesos=None):
+    """
+    Exporta una figura animada a un archivo HTML interactivo y, de forma
+    opcional, a videos creados con los cuadros renderizados en paralelo.
+
+    Parameters
+    ----------
+    figura : dict
+        La figura con sus cuadros en 'frames'. Cada cuadro solo lleva
+        lo que cambia respecto a la figura.
+
+    ruta : str
+        La ruta del archivo HTML. Los videos se guardan junto a él
+        con su propia extensión.
+
+    videos : list
+        Los formatos de video (gif o mp4) que se desean crear.
+
+    procesos : int
+        El número de procesos para renderizar los cuadros.
+        Por defecto se usa uno por núcleo.
+
+    Raises
+    ------
+    ValueError
+        Si algún formato de video no es válido.
+
+    RuntimeError
+        Si se pidió un MP4 y ffmpeg no está instalado.
+
+    """
+
+    invalidos = sorted(set(videos) - set(FORMATOS_ANIMACION))
+
+    if invalidos:
+        raise ValueError(f"Formatos de video no válidos: {', '.join(invalidos)}")
+
+    if "mp4" in videos and shutil.which("ffmpeg") is None:
+        raise RuntimeError("Se necesita ffmpeg para crear el video MP4.")
+
+    huella = huella_figuras([figura])
+    huella["salidas"] = {
+        "formatos": ["html"] + list(videos),
+        "miniaturas": [],
+        "cuantizar": False,
+    }
+
+    if imagen_vigente(ruta, huella):
+        return
+
+    base, _ = os.path.splitext(ruta)
+
+    etapa("html")
+
+    guardar_html([agregar_controles(figura)], ruta)
+
+    if videos:
+        etapa("cuadros")
+
+        cuadros = renderizar_cuadros(figura, procesos)
+
+    if "gif" in videos:
+        etapa("gif")
+
+        guardar_gif(cuadros, f"{base}.gif")
+
+    if "mp4" in videos:
+        etapa("mp4")
+
+        guardar_mp4(cuadros, f"{base}.mp4")
+
+    escribir_archivo(f"{ruta}.json", json.dumps(huella).encode("utf-8"))
+
+
+def agregar_controles(figura):
+    """
+    Agrega a una figura animada un botón para reproducirla
+    y un control deslizante para elegir el cuadro.
+
+    Parameters
+    ----------
+    figura : dict
+        La figura con sus cuadros en 'frames'.
+
+    Returns
+    -------
+    dict
+        Una copia de la figura, más alta para dejar espacio a los controles.
+
+    """
+
+    diseño = dict(figura["layout"])
+    margen = dict(diseño.get("margin", {}))
+
+    # Los controles van debajo del margen inferior original, medido
+    # en la altura del área de la gráfica, que no cambia.
+    alto = diseño.get("height", 720)
+    area = alto - margen.get("t", 0) - margen.get("b", 0)
+    inicio = -(margen.get("b", 0) + 30) / area
+
+    margen["b"] = margen.get("b", 0) + ALTO_CONTROLES
+    diseño["margin"] = margen
+    diseño["height"] = alto + ALTO_CONTROLES
+
+    # Los mapas necesitan volver a dibujarse en cada cuadro.
+    reproducir = {
+        "frame": {"duration": DURACION_CUADRO, "redraw": True},
+        "transition": {"duration": 0},
+        "fromcurrent": True,
+    }
+
+    elegir = {
+        "mode": "immediate",
+        "frame": {"duration": 0, "redraw": True},
+        "transition": {"duration": 0},
+    }
+
+    diseño["updatemenus"] = [
+        {
+            "type": "buttons",
+            "direction": "left",
+            "showactive": False,
+            "x": 0.01,
+            "y": inicio,
+            "xanchor": "left",
+            "yanchor": "top",
+            "pad": {"t": 10, "r": 10},
+            "buttons": [
+                {"label": "▶", "method": "animate", "args": [None, reproducir]},
+                {"label": "❚❚", "method": "animate", "args": [[None], elegir]},
+            ],
+        }
+    ]
+
+    diseño["sliders"] = [
+        {
+            "active": 0,
+            "x": 0.1,
+            "y": inicio,
+            "len": 0.9,
+            "xanchor": "left",
+            "yanchor": "top",
+            "pad": {"t": 10},
+            "currentvalue": {"visible": False},
+            "steps": [
+                {
+                    "label": cuadro["name"],
+                    "method": "animate",
+                    "args": [[cuadro["name"]], elegir],
+                }
+                for cuadro in figura["frames"]
+            ],
+        }
+    ]
+
+    return {**figura, "layout": diseño}
+
+
+def renderizar_cuadros(figura, procesos=None):
+    """
+    Renderiza cada cuadro de una figura animada a PNG en varios procesos.
+    La figura se envía una sola vez a cada proceso y después
+    solo se envían los cambios de cada cuadro.
+
+    Parameters
+    ----------
+    figura : dict
+        La figura con sus cuadros en 'frames'.
+
+    procesos : int
+        El número de procesos a utilizar. Por defecto se usa uno por núcleo.
+
+    Returns
+    -------
+    list
+        El contenido PNG de cada cuadro, en orden.
+
+    """
+
+    cuadros = figura["frames"]
+    base = {"data": figura["data"], "layout": figura["layout"]}
+
+    with ProcessPoolExecutor(
+        max_workers=min(procesos or os.cpu_count(), len(cuadros)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=iniciar_cuadros,
+        initargs=(base,),
+    ) as pool:
+        return list(pool.map(renderizar_cuadro, cuadros))
+
+
+def iniciar_cuadros(figura):
+    """
+    Guarda la figura base de una animación en el proceso e inicia Kaleido.
+
+    Parameters
+    ----------
+    figura : dict
+        La figura sin sus cuadros.
+
+    """
+
+    global _figura_cuadros
+
+    _figura_cuadros = figura
+
+    iniciar_kaleido()
+
+
+def renderizar_cuadro(cuadro):
+    """
+    Renderiza un cuadro de la animación a PNG.
+
+    Parameters
+    ----------
+    cuadro : dict
+        Los cambios del cuadro respecto a la figura base.
+
+    Returns
+    -------
+    bytes
+        El contenido PNG.
+
+    """
+
+    import plotly.io as pio
+
+    datos = list(_figura_cuadros["data"])
+
+    for indice, cambios in zip(cuadro.get("traces", range(len(datos))), cuadro["data"]):
+        datos[indice] = combinar(datos[indice], cambios)
+
+    figura = {
+        "data": datos,
+        "layout": combinar(_figura_cuadros["layout"], cuadro.get("layout", {})),
+    }
+
+    return pio.to_image(figura, format="png", validate=False)
+
+
+def combinar(base, cambios):
+    """
+    Aplica los cambios de un cuadro a un diccionario, como lo hace plotly.js:
+    los diccionarios se combinan y los demás valores se reemplazan.
+
+    Parameters
+    ----------
+    base : dict
+        El diccionario original, que no se modifica.
+
+    cambios : dict
+        Los valores nuevos.
+
+    Returns
+    -------
+    dict
+        El diccionario combinado.
+
+    """
+
+    resultado = dict(base)
+
+    for llave, valor in cambios.items():
+        if isinstance(valor, dict) and isinstance(resultado.get(llave), dict):
+            resultado[llave] = combinar(resultado[llave], valor)
+        else:
+            resultado[llave] = valor
+
+    return resultado
+
+
+def guardar_gif(cuadros, ruta):
+    """
+    Une los cuadros de una animación en un GIF que se repite sin fin.
+
+    Parameters
+    ----------
+    cuadros : list
+        El contenido PNG de cada cuadro.
+
+    ruta : str
+        La ruta del archivo GIF.
+
+    """
+
+    from PIL import Image
+
+    imagenes = [Image.open(io.BytesIO(cuadro)).convert("RGB") for cuadro in cuadros]
+
+    contenido = io.BytesIO()
+
+    imagenes[0].save(
+        contenido,
+        format="GIF",
+        save_all=True,
+        append_images=imagenes[1:],
+        duration=DURACION_CUADRO,
+        loop=0,
+    )
+
+    escribir_archivo(ruta, contenido.getvalue())
+
+
+def guardar_mp4(cuadros, ruta):
+    """
+    Une los cuadros de una animación en un video MP4 usando ffmpeg.
+
+    Parameters
+    ----------
+    cuadros : list
+        El contenido PNG de cada cuadro.
+
+    ruta : str
+        La ruta del archivo MP4.
+
+    """
+
+    temporal = f"{ruta}.tmp"
+
+    # Los cuadros se envían a ffmpeg por su entrada estándar. H.264 requiere
+    # dimensiones pares, así que las redondeamos si es necesario.
+    subprocess.run(
+        [
+            shutil.which("ffmpeg"),
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "image2pipe",
+            "-framerate",
+            f"{1000 / DURACION_CUADRO:g}",
+            "-i",
+            "-",
+            "-vf",
+            "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-r",
+            "30",
+            "-f",
+            "mp4",
+            temporal,
+        ],
+        input=b"".join(cuadros),
+        check=True,
+    )
+
+    os.replace(temporal, ruta)
+
+
+def escribir_archivo(ruta, contenido):
+    """
+    Escribe un archivo de forma atómica: primero en un archivo temporal
+    que después reemplaza al original, así nunca queda a medias.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta del archivo.
+
+    contenido : bytes
+        El contenido del archivo.
+
+    """
+
+    temporal = f"{ruta}.tmp"
+
+    with open(temporal, "wb") as archivo:
+        archivo.write(contenido)
+
+    os.replace(temporal, ruta)
@@ -0,0 +1,220 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from datos import calcular_hash
+
+
+# Ruta del GeoJSON original de México.
+RUTA_GEOJSON = "./assets/mexico.json"
+
+# El ancho en pixeles de nuestros mapas.
+ANCHO_MAPA = 1280
+
+
+def cargar_geojson(ruta=RUTA_GEOJSON, ancho=ANCHO_MAPA):
+    """
+    Carga el GeoJSON simplificado para un mapa del ancho indicado.
+
+    La versión simplificada se guarda junto al archivo original y su nombre
+    incluye el hash del original y el ancho del mapa (del cual depende la
+    tolerancia), así se vuelve a crear cuando alguno de los dos cambia.
+
+    Parameters
+    ----------
+    ruta : str
+        La ruta del GeoJSON original.
+
+    ancho : int
+        El ancho en pixeles del mapa. Si es None se carga el GeoJSON original.
+
+    Returns
+    -------
+    dict
+        El GeoJSON.
+
+    """
+
+    if ancho is None:
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+
+    base, extension = os.path.splitext(ruta)
+    ruta_cache = f"{base}.{calcular_hash(ruta)[:12]}.{ancho}px{extension}"
+
+    if os.path.exists(ruta_cache):
+        with open(ruta_cache, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+
+    with open(ruta, "r", encoding="utf-8") as archivo:
+        geojson = json.load(archivo)
+
+    geojson = simplificar_geojson(geojson, calcular_tolerancia(geojson, ancho))
+
+    temporal = f"{ruta_cache}.tmp"
+
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(geojson, archivo, ensure_ascii=False, separators=(",", ":"))
+
+    os.replace(temporal, ruta_cache)
+
+    return geojson
+
+
+def calcular_tolerancia(geojson, ancho):
+    """
+    Calcula la tolerancia de simplificación: el tamaño en grados
+    de medio pixel cuando el GeoJSON ocupa todo el ancho del mapa.
+
+    Parameters
+    ----------
+    geojson : dict
+        El GeoJSON original.
+
+    ancho : int
+        El ancho en pixeles del mapa.
+
+    Returns
+    -------
+    float
+        La tolerancia en grados, redondeada a una cifra significativa.
+
+    """
+
+    longitudes = [
+        punto[0]
+        for item in geojson["features"]
+        for anillo in obtener_anillos(item["geometry"])
+        for punto in anillo
+    ]
+
+    tolerancia = (max(longitudes) - min(longitudes)) / ancho / 2
+    exponente = math.floor(math.log10(tolerancia))
+
+    return round(tolerancia, -exponente)
+
+
+def simplificar_geojson(geojson, tolerancia):
+    """
+    Simplifica los polígonos de un GeoJSON ajustando sus vértices a una
+    cuadrícula del tamaño de la tolerancia.
+
+    Como cada vértice se ajusta de la misma forma sin importar el polígono
+    al que pertenece, las fronteras compartidas entre entidades se siguen
+    tocando después de simplificarlas.
+
+    Parameters
+    ----------
+    geojson : dict
+        El GeoJSON original.
+
+    tolerancia : float
+        El tamaño de la cuadrícula en grados.
+
+    Returns
+    -------
+    dict
+        Un nuevo GeoJSON con los polígonos simplificados.
+
+    """
+
+    # Redondeamos las coordenadas a los decimales que necesita la tolerancia.
+    decimales = max(0, -math.floor(math.log10(tolerancia))) + 1
+
+    features = list()
+
+    for item in geojson["features"]:
+        geometria = item["geometry"]
+
+        if geometria["type"] == "Polygon":
+            poligonos = [geometria["coordinates"]]
+        else:
+            poligonos = geometria["coordinates"]
+
+        nuevos = list()
+
+        for poligono in poligonos:
+            anillos = [
+                simplificar_anillo(anillo, tolerancia, decimales) for anillo in poligono
+            ]
+
+            # Si el anillo exterior desaparece, descartamos el polígono completo.
+            if anillos[0] is None:
+                continue
+
+            nuevos.append([anillo for anillo in anillos if anillo is not None])
+
+        # Si la entidad completa es más pequeña que la tolerancia, la dejamos igual.
+        if len(nuevos) == 0:
+            nueva = geometria
+        elif geometria["type"] == "Polygon":
+            nueva = {"type": "Polygon", "coordinates": nuevos[0]}
+        else:
+            nueva = {"type": "MultiPolygon", "coordinates": nuevos}
+
+        features.append({**item, "geometry": nueva})
+
+    return {**geojson, "features": features}
+
+
+def simplificar_anillo(anillo, tolerancia, decimales):
+    """
+    Ajusta los vértices de un anillo a la cuadrícula y quita los repetidos.
+
+    Parameters
+    ----------
+    anillo : list
+        Las coordenadas del anillo.
+
+    tolerancia : float
+        El tamaño de la cuadrícula en grados.
+
+    decimales : int
+        El número de decimales de las coordenadas resultantes.
+
+    Returns
+    -------
+    list or None
+        Las nuevas coordenadas del anillo, o None si quedan menos de 4 puntos.
+
+    """
+
+    puntos = np.round(np.asarray(anillo, dtype=float)[:, :2] / tolerancia)
+
+    # Quitamos los puntos que quedaron repetidos de forma consecutiva.
+    mantener = np.ones(len(puntos), dtype=bool)
+    mantener[1:] = np.any(puntos[1:] != puntos[:-1], axis=1)
+    puntos = puntos[mantener]
+
+    # Nos aseguramos que el anillo siga cerrado.
+    if np.any(puntos[0] != puntos[-1]):
+        puntos = np.vstack([puntos, puntos[:1]])
+
+    if len(puntos) < 4:
+        return None
+
+    return np.round(puntos * tolerancia, decimales).tolist()
+
+
+def obtener_anillos(geometria):
+    """
+    Regresa todos los anillos de un Polygon o MultiPolygon.
+
+    Parameters
+    ----------
+    geometria : dict
+        La geometría de un feature del GeoJSON.
+
+    Returns
+    -------
+    list
+        Las coordenadas de cada anillo.
+
+    """
+
+    if geometria["type"] == "Polygon":
+        return geometria["coordinates"]
+
+    return [anillo for poligono in geometria["coordinates"] for anillo in poligono]
@@ -0,0 +1,44 @@
+import argparse
+
+from cubo import ingresar_año, particionar_datos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Agrega un año nuevo de microdatos de la EMAT al dataset particionado.",
+        epilog=(
+            "Si el dataset particionado no existe, se crea primero a partir de "
+            "data.csv. Una vez creado, las gráficas ya no leen data.csv: si lo "
+            "modificas vuelve a ejecutar con --particionar."
+        ),
+    )
+
+    parser.add_argument(
+        "archivos",
+        nargs="*",
+        help="Archivos CSV con los microdatos de un año cada uno.",
+    )
+
+    parser.add_argument(
+        "--particionar",
+        action="store_true",
+        help="Crea (o vuelve a crear) primero el dataset particionado a partir de data.csv.",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.particionar:
+            años = particionar_datos()
+
+            if len(años) == 0:
+                parser.error(
+                    "data.csv no tiene registros, no se particionó ningún año."
+                )
+
+            print(f"Se particionaron {len(años)} años: {años[0]}-{años[-1]}")
+
+        for archivo in args.archivos:
+            print(f"Se agregó el año {ingresar_año(archivo)} desde {archivo}")
+    except (ValueError, OSError) as error:
+        parser.error(str(error))
@@ -0,0 +1,202 @@
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # El módulo resource no existe en Windows.
+    resource = None
+
+
+# Si se define la variable de entorno MEDICIONES con la ruta de un archivo,
+# cada función instrumentada agrega ahí sus mediciones en formato JSON Lines.
+RUTA_MEDICIONES = os.environ.get("MEDICIONES")
+
+# Las funciones instrumentadas que se están ejecutando, de la más externa
+# a la más interna, junto con la etapa en la que va cada una.
+_pila = list()
+
+
+def medir(funcion):
+    """
+    Decorador que mide el tiempo y la memoria de cada etapa de una función.
+
+    Las etapas se marcan dentro de la función llamando a etapa(). Al terminar
+    se registra también el total de la función. Si RUTA_MEDICIONES no está
+    definida la función se ejecuta sin cambios.
+
+    Parameters
+    ----------
+    funcion : callable
+        La función que se desea instrumentar.
+
+    Returns
+    -------
+    callable
+        La función instrumentada.
+
+    """
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if RUTA_MEDICIONES is None:
+            return funcion(*args, **kwargs)
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        inicio = time.perf_counter()
+
+        _pila.append(
+            {
+                "funcion": funcion.__name__,
+                "argumentos": [describir(arg) for arg in args],
+                "etapa": None,
+                "inicio": inicio,
+                "pico": 0,
+                "pico_etapa": 0,
+            }
+        )
+
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            cerrar_etapa()
+
+            actual = _pila.pop()
+            actual["etapa"] = "total"
+            actual["inicio"] = inicio
+
+            registrar(actual, actual["pico"])
+
+            # La memoria de la función también cuenta para la función
+            # y la etapa desde donde fue llamada.
+            if _pila:
+                _pila[-1]["pico"] = max(_pila[-1]["pico"], actual["pico"])
+                _pila[-1]["pico_etapa"] = max(_pila[-1]["pico_etapa"], actual["pico"])
+
+    return envoltura
+
+
+def etapa(nombre):
+    """
+    Marca el comienzo de una etapa en la función instrumentada actual.
+    La etapa anterior, si la hay, se cierra y se registra.
+
+    Parameters
+    ----------
+    nombre : str
+        El nombre de la etapa (carga, transformacion, figura, exportacion, etc.).
+
+    """
+
+    if not _pila:
+        return
+
+    cerrar_etapa()
+
+    tracemalloc.reset_peak()
+
+    _pila[-1]["etapa"] = nombre
+    _pila[-1]["inicio"] = time.perf_counter()
+
+
+def cerrar_etapa():
+    """
+    Registra la etapa en curso de la función instrumentada actual.
+    """
+
+    acumular_pico()
+
+    actual = _pila[-1]
+
+    if actual["etapa"] is not None:
+        registrar(actual, actual["pico_etapa"])
+
+    actual["etapa"] = None
+    actual["pico_etapa"] = 0
+
+
+def acumular_pico():
+    """
+    Agrega la memoria máxima desde el último reinicio de tracemalloc a todas
+    las funciones instrumentadas en curso y a sus etapas. Debe llamarse antes
+    de cada reinicio para que las funciones externas no pierdan el pico de
+    las etapas de las funciones que llaman.
+    """
+
+    pico = tracemalloc.get_traced_memory()[1]
+
+    for actual in _pila:
+        actual["pico"] = max(actual["pico"], pico)
+        actual["pico_etapa"] = max(actual["pico_etapa"], pico)
+
+
+def registrar(actual, pico):
+    """
+    Agrega una medición al archivo de mediciones.
+
+    Parameters
+    ----------
+    actual : dict
+        La función y etapa medidas, con el momento en que comenzó la etapa.
+
+    pico : int
+        La memoria máxima en bytes reservada por Python durante la etapa.
+
+    """
+
+    # ru_maxrss está en kilobytes en Linux.
+    if resource is None:
+        rss = None
+    else:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    medicion = {
+        "funcion": actual["funcion"],
+        "argumentos": actual["argumentos"],
+        "etapa": actual["etapa"],
+        "segundos": time.perf_counter() - actual["inicio"],
+        "memoria_pico_mb": pico / 1024**2,
+        "rss_pico_mb": rss,
+        "pid": os.getpid(),
+    }
+
+    with open(RUTA_MEDICIONES, "a", encoding="utf-8") as archivo:
+        archivo.write(json.dumps(medicion, ensure_ascii=False) + "\n")
+
+
+def describir(argumento):
+    """
+    Describe un argumento de forma breve para el archivo de mediciones.
+
+    Parameters
+    ----------
+    argumento : object
+        El argumento de la función instrumentada.
+
+    Returns
+    -------
+    object
+        El argumento si es un valor simple o una lista de valores simples,
+        cada elemento descrito si es una tupla y en otro caso el nombre de su tipo.
+
+    """
+
+    simples = (bool, int, float, str, type(None))
+
+    if isinstance(argumento, simples):
+        return argumento
+
+    if isinstance(argumento, tuple):
+        return [describir(valor) for valor in argumento]
+
+    if isinstance(argumento, list) and all(
+        isinstance(valor, simples) for valor in argumento
+    ):
+        return argumento
+
+    return type(argumento).__name__
@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+# El nivel de confianza de los intervalos.
+NIVEL = 0.95
+
+# El bootstrap se reparte en bloques de celdas con su propia semilla,
+# así el resultado no depende del número de procesos. Si el número de
+# muestras (celdas por réplicas) es menor al mínimo se calcula en este proceso.
+CELDAS_POR_BLOQUE = 256
+MINIMO_PARALELO = 10_000_000
+
+
+def intervalo_exacto(conteos, nivel=NIVEL):
+    """
+    Calcula el intervalo exacto de Poisson (de Garwood) de cada conteo,
+    usando los cuantiles de la distribución Gamma.
+
+    Parameters
+    ----------
+    conteos : array_like
+        Los registros observados, de cualquier forma.
+
+    nivel : float
+        El nivel de confianza, entre 0 y 1.
+
+    Returns
+    -------
+    numpy.ndarray
+        El límite inferior del número esperado de registros. Es 0 cuando
+        no hubo registros.
+
+    numpy.ndarray
+        El límite superior del número esperado de registros.
+
+    """
+
+    from scipy.special import gammaincinv
+
+    conteos = np.asarray(conteos, dtype=np.float64)
+    alfa = (1 - nivel) / 2
+
+    # La Gamma de forma 0 no está definida, su límite inferior es 0.
+    positivos = conteos > 0
+
+    inferior = np.where(
+        positivos, gammaincinv(np.where(positivos, conteos, 1), alfa), 0.0
+    )
+    superior = gammaincinv(conteos + 1, 1 - alfa)
+
+    return inferior, superior
+
+
+def intervalo_bootstrap(conteos, replicas=1000, nivel=NIVEL, semilla=0, procesos=None):
+    """
+    Calcula un intervalo por bootstrap paramétrico: simula cada conteo como
+    una variable de Poisson con media igual al conteo observado y toma los
+    percentiles de las réplicas.
+
+    Con muchas réplicas los bloques de celdas se reparten entre varios procesos.
+
+    Parameters
+    ----------
+    conteos : array_like
+        Los registros observados, de cualquier forma.
+
+    replicas : int
+        El número de réplicas por conteo.
+
+    nivel : float
+        El nivel de confianza, entre 0 y 1.
+
+    semilla : int
+        La semilla del generador de números aleatorios.
+
+    procesos : int
+        El número de procesos a utilizar. Por defecto se usa uno por núcleo.
+
+    Returns
+    -------
+    numpy.ndarray
+        El percentil inferior de las réplicas. Un conteo de 0 siempre
+        tiene un intervalo de 0 a 0, para esos casos conviene usar
+        intervalo_exacto().
+
+    numpy.ndarray
+        El percentil superior de las réplicas.
+
+    """
+
+    conteos = np.asarray(conteos, dtype=np.float64)
+    planos = conteos.ravel()
+
+    bloques = [
+        planos[inicio : inicio + CELDAS_POR_BLOQUE]
+        for inicio in range(0, len(planos), CELDAS_POR_BLOQUE)
+    ]
+
+    semillas = np.random.SeedSequence(semilla).spawn(len(bloques))
+
+    argumentos = (bloques, [replicas] * len(bloques), [nivel] * len(bloques), semillas)
+
+    if len(bloques) <= 1 or procesos == 1 or planos.size * replicas < MINIMO_PARALELO:
+        resultados = list(map(bootstrap_bloque, *argumentos))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(procesos or os.cpu_count(), len(bloques)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            resultados = list(pool.map(bootstrap_bloque, *argumentos))
+
+    if not resultados:
+        return np.empty(conteos.shape), np.empty(conteos.shape)
+
+    limites = np.concatenate(resultados, axis=1)
+
+    return limites[0].reshape(conteos.shape), limites[1].reshape(conteos.shape)
+
+
+def bootstrap_bloque(conteos, replicas, nivel, semilla):
+    """
+    Calcula el bootstrap paramétrico de un bloque de conteos.
+
+    Parameters
+    ----------
+    conteos : numpy.ndarray
+        Los registros observados del bloque, en una dimensión.
+
+    replicas : int
+        El número de réplicas por conteo.
+
+    nivel : float
+        El nivel de confianza, entre 0 y 1.
+
+    semilla : numpy.random.SeedSequence
+        La semilla del bloque.
+
+    Returns
+    -------
+    numpy.ndarray
+        Un arreglo de (2, conteos) con los percentiles inferior y superior.
+
+    """
+
+    rng = np.random.default_rng(semilla)
+    alfa = (1 - nivel) / 2
+
+    # Todas las réplicas del bloque se simulan a la vez.
+    muestras = rng.poisson(conteos[:, None], size=(len(conteos), replicas))
+
+    return np.quantile(muestras, [alfa, 1 - alfa], axis=1)
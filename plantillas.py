@@ -0,0 +1,295 @@
+# Definimos los colores que usaremos para todas las gráficas.
+PLOT_COLOR = "#0F0F0F"
+PAPER_COLOR = "#232D3F"
+HEADER_COLOR = "#5c6bc0"
+
+# El estilo que comparten los ejes de todas nuestras gráficas.
+EJE = {
+    "ticks": "outside",
+    "ticklen": 10,
+    "tickcolor": "#FFFFFF",
+    "linewidth": 2,
+    "showline": True,
+    "showgrid": True,
+    "gridwidth": 0.35,
+    "mirror": True,
+}
+
+# Aquí guardaremos la plantilla de Plotly una vez que haya sido cargada.
+_plantilla = None
+
+
+def crear_figura(datos, diseño):
+    """
+    Arma una figura como diccionario, lista para exportarse sin pasar
+    por los validadores de plotly.graph_objects.
+
+    Parameters
+    ----------
+    datos : list
+        Las trazas de la figura, cada una con su 'type'.
+
+    diseño : dict
+        El layout de la figura.
+
+    Returns
+    -------
+    dict
+        La figura, con la misma plantilla que agrega go.Figure().
+
+    """
+
+    return {"data": datos, "layout": {"template": plantilla_plotly(), **diseño}}
+
+
+def plantilla_plotly():
+    """
+    Regresa la plantilla por defecto de Plotly como diccionario.
+    Se carga una sola vez y todas las figuras la comparten.
+    """
+
+    global _plantilla
+
+    if _plantilla is None:
+        import plotly.io as pio
+
+        _plantilla = pio.templates[pio.templates.default].to_plotly_json()
+
+    return _plantilla
+
+
+def diseño_base(titulo, **cambios):
+    """
+    Crea el layout de nuestras gráficas de barras y de líneas.
+
+    Parameters
+    ----------
+    titulo : str
+        El título de la gráfica.
+
+    **cambios
+        Las propiedades del layout que se agregan o reemplazan.
+
+    Returns
+    -------
+    dict
+        El layout.
+
+    """
+
+    return {
+        "showlegend": True,
+        "width": 1280,
+        "height": 720,
+        "font": {"family": "Lato", "color": "#FFFFFF", "size": 18},
+        "title": {"text": titulo, "font": {"size": 24}, "x": 0.5, "y": 0.965},
+        "margin": {"t": 60, "l": 100, "r": 40, "b": 90},
+        "plot_bgcolor": PLOT_COLOR,
+        "paper_bgcolor": PAPER_COLOR,
+        **cambios,
+    }
+
+
+def eje_x(**cambios):
+    """
+    Crea el eje horizontal de nuestras gráficas.
+
+    Parameters
+    ----------
+    **cambios
+        Las propiedades del eje que se agregan o reemplazan.
+
+    Returns
+    -------
+    dict
+        El eje.
+
+    """
+
+    return {**EJE, "nticks": 15, **cambios}
+
+
+def eje_y(titulo, **cambios):
+    """
+    Crea el eje vertical de nuestras gráficas.
+
+    Parameters
+    ----------
+    titulo : str
+        El título del eje.
+
+    **cambios
+        Las propiedades del eje que se agregan o reemplazan.
+
+    Returns
+    -------
+    dict
+        El eje.
+
+    """
+
+    return {
+        **EJE,
+        "title": {"text": titulo, "font": {"size": 20}, "standoff": 6},
+        "zeroline": False,
+        "separatethousands": True,
+        "nticks": 20,
+        **cambios,
+    }
+
+
+def leyenda(x, xanchor, **cambios):
+    """
+    Crea la leyenda de nuestras gráficas, con borde y en la parte superior.
+
+    Parameters
+    ----------
+    x : float
+        La posición horizontal de la leyenda.
+
+    xanchor : str
+        El punto de la leyenda que se ubica en x: 'left', 'center' o 'right'.
+
+    **cambios
+        Las propiedades de la leyenda que se agregan o reemplazan.
+
+    Returns
+    -------
+    dict
+        La leyenda.
+
+    """
+
+    return {
+        "itemsizing": "constant",
+        "bordercolor": "#FFFFFF",
+        "borderwidth": 1,
+        "x": x,
+        "xanchor": xanchor,
+        "y": 0.98,
+        "yanchor": "top",
+        **cambios,
+    }
+
+
+def pie_de_pagina(fuente, centro="Año de registro del matrimonio"):
+    """
+    Crea las anotaciones debajo de la gráfica: la fuente, el título
+    del eje horizontal y el crédito.
+
+    Parameters
+    ----------
+    fuente : str
+        El texto de la fuente.
+
+    centro : str
+        El texto del centro.
+
+    Returns
+    -------
+    list
+        Las tres anotaciones.
+
+    """
+
+    textos = [
+        (0.01, "left", fuente),
+        (0.5, "center", centro),
+        (1.01, "right", "🧁 @lapanquecita"),
+    ]
+
+    return [
+        {
+            "x": x,
+            "y": -0.14,
+            "xref": "paper",
+            "yref": "paper",
+            "xanchor": xanchor,
+            "yanchor": "top",
+            "text": texto,
+        }
+        for x, xanchor, texto in textos
+    ]
+
+
+def barras_error(df):
+    """
+    Crea las barras de error de una traza a partir de los límites
+    del intervalo de confianza de la tasa.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Las tasas con sus columnas tasa, tasa_inf y tasa_sup.
+
+    Returns
+    -------
+    dict
+        Las barras de error, para usarse como 'error_y' de la traza.
+
+    """
+
+    return {
+        "type": "data",
+        "symmetric": False,
+        "array": df["tasa_sup"] - df["tasa"],
+        "arrayminus": df["tasa"] - df["tasa_inf"],
+        "color": "#FFFFFF",
+        "thickness": 1.5,
+        "width": 4,
+    }
+
+
+def tabla(encabezados, valores, formatos, sufijos=None, **cambios):
+    """
+    Crea una traza de tabla con nuestro estilo.
+
+    Parameters
+    ----------
+    encabezados : list
+        Los textos de los encabezados.
+
+    valores : list
+        Los valores de cada columna.
+
+    formatos : list
+        El formato de cada columna.
+
+    sufijos : list
+        El texto que se agrega después del valor de cada columna.
+
+    **cambios
+        Las propiedades de la traza que se agregan o reemplazan.
+
+    Returns
+    -------
+    dict
+        La traza.
+
+    """
+
+    celdas = {
+        "values": valores,
+        "fill": {"color": PLOT_COLOR},
+        "height": 29,
+        "format": formatos,
+        "line": {"width": 0.8},
+        "align": ["left", "center"],
+    }
+
+    if sufijos is not None:
+        celdas["suffix"] = sufijos
+
+    return {
+        "type": "table",
+        "header": {
+            "values": encabezados,
+            "font": {"color": "#FFFFFF"},
+            "fill": {"color": HEADER_COLOR},
+            "align": "center",
+            "height": 29,
+            "line": {"width": 0.8},
+        },
+        "cells": celdas,
+        **cambios,
+    }
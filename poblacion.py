@@ -0,0 +1,197 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Carpeta con la población adulta estimada por entidad y año.
+CARPETA_POBLACION = "./assets/poblacion_adulta"
+
+# El archivo de cada sexo. Usamos las mismas claves que la EMAT
+# (1 hombres, 2 mujeres) y el 0 para la población total.
+ARCHIVOS = {0: "total", 1: "hombres", 2: "mujeres"}
+
+ENTIDADES = {
+    1: "Aguascalientes",
+    2: "Baja California",
+    3: "Baja California Sur",
+    4: "Campeche",
+    5: "Coahuila",
+    6: "Colima",
+    7: "Chiapas",
+    8: "Chihuahua",
+    9: "Ciudad de México",
+    10: "Durango",
+    11: "Guanajuato",
+    12: "Guerrero",
+    13: "Hidalgo",
+    14: "Jalisco",
+    15: "Estado de México",
+    16: "Michoacán",
+    17: "Morelos",
+    18: "Nayarit",
+    19: "Nuevo León",
+    20: "Oaxaca",
+    21: "Puebla",
+    22: "Querétaro",
+    23: "Quintana Roo",
+    24: "San Luis Potosí",
+    25: "Sinaloa",
+    26: "Sonora",
+    27: "Tabasco",
+    28: "Tamaulipas",
+    29: "Tlaxcala",
+    30: "Veracruz",
+    31: "Yucatán",
+    32: "Zacatecas",
+}
+
+# Aquí guardaremos la matriz de población y su primer año una vez que haya sido cargada.
+_poblacion = None
+
+
+def cargar_poblacion():
+    """
+    Carga la población adulta de todas las entidades, años y sexos en una
+    sola matriz. Los archivos se leen únicamente la primera vez.
+
+    Returns
+    -------
+    numpy.ndarray
+        Una matriz de (entidad, año, sexo). La entidad va de 0 (total nacional)
+        a 32, el año se cuenta desde el primer año de los archivos y el sexo
+        es 0 (total), 1 (hombres) o 2 (mujeres). Los valores que no vienen
+        en los archivos son NaN.
+
+    int
+        El primer año de la matriz.
+
+    """
+
+    global _poblacion
+
+    if _poblacion is None:
+        tablas = {sexo: leer_tabla(archivo) for sexo, archivo in ARCHIVOS.items()}
+
+        columnas = [año for tabla in tablas.values() for año in tabla.columns]
+        primer_año = min(columnas)
+
+        matriz = np.full(
+            (len(ENTIDADES) + 1, max(columnas) - primer_año + 1, len(ARCHIVOS)),
+            np.nan,
+        )
+
+        for sexo, tabla in tablas.items():
+            filas = tabla.index.to_numpy()[:, None]
+            años = tabla.columns.to_numpy()[None, :] - primer_año
+
+            matriz[filas, años, sexo] = tabla.to_numpy()
+
+        _poblacion = (matriz, primer_año)
+
+    return _poblacion
+
+
+def leer_tabla(archivo):
+    """
+    Lee un archivo de población adulta.
+
+    Parameters
+    ----------
+    archivo : str
+        La población que se desea leer: 'total', 'hombres' o 'mujeres'.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Un DataFrame indexado por la clave de la entidad (0 para el total
+        nacional) con una columna por año.
+
+    """
+
+    pop = pd.read_csv(os.path.join(CARPETA_POBLACION, f"{archivo}.csv"), index_col=0)
+
+    claves = {nombre: clave for clave, nombre in ENTIDADES.items()}
+
+    # El archivo usa el nombre oficial del Estado de México y
+    # su primera fila es el total nacional.
+    claves["México"] = 15
+    claves[pop.index[0]] = 0
+
+    pop.index = pop.index.map(claves)
+    pop.columns = pop.columns.astype(int)
+
+    return pop
+
+
+def obtener_poblacion(año, entidad=0, sexo=0):
+    """
+    Consulta la población adulta. Cada parámetro puede ser un número o un
+    arreglo; los arreglos se combinan siguiendo las reglas de broadcasting
+    de NumPy, así una sola llamada obtiene la población de muchas combinaciones.
+
+    Parameters
+    ----------
+    año : int or array_like
+        El año.
+
+    entidad : int or array_like
+        La clave de la entidad, 0 para el total nacional.
+
+    sexo : int or array_like
+        0 para la población total, 1 para hombres y 2 para mujeres.
+
+    Returns
+    -------
+    float or numpy.ndarray
+        La población. Es NaN para combinaciones que no están en los archivos,
+        como años fuera de rango o sexo no especificado.
+
+    """
+
+    matriz, primer_año = cargar_poblacion()
+
+    año, entidad, sexo = np.broadcast_arrays(
+        np.asarray(año, dtype=np.int64) - primer_año,
+        np.asarray(entidad, dtype=np.int64),
+        np.asarray(sexo, dtype=np.int64),
+    )
+
+    validos = (
+        (año >= 0)
+        & (año < matriz.shape[1])
+        & (entidad >= 0)
+        & (entidad < matriz.shape[0])
+        & (sexo >= 0)
+        & (sexo < matriz.shape[2])
+    )
+
+    resultado = np.full(año.shape, np.nan)
+    resultado[validos] = matriz[entidad[validos], año[validos], sexo[validos]]
+
+    if resultado.ndim == 0:
+        return resultado.item()
+
+    return resultado
+
+
+def tasas(conteos, año, entidad=0, sexo=0):
+    """
+    Calcula tasas por cada 100,000 habitantes mayores de edad.
+
+    Parameters
+    ----------
+    conteos : array_like
+        Los registros de cada combinación.
+
+    año, entidad, sexo : int or array_like
+        Las dimensiones de cada registro, como en obtener_poblacion().
+
+    Returns
+    -------
+    numpy.ndarray
+        La tasa de cada combinación.
+
+    """
+
+    return np.asarray(conteos) / obtener_poblacion(año, entidad, sexo) * 100000
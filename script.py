@@ -1,116 +1,111 @@
-import json
+import argparse
 import os
 
 import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-from PIL import Image
-from plotly.subplots import make_subplots
-
-
-# Definimos los colores que usaremos para todas las gráficas.
-PLOT_COLOR = "#0F0F0F"
-PAPER_COLOR = "#232D3F"
-HEADER_COLOR = "#5c6bc0"
-
-
-ENTIDADES = {
-    1: "Aguascalientes",
-    2: "Baja California",
-    3: "Baja California Sur",
-    4: "Campeche",
-    5: "Coahuila",
-    6: "Colima",
-    7: "Chiapas",
-    8: "Chihuahua",
-    9: "Ciudad de México",
-    10: "Durango",
-    11: "Guanajuato",
-    12: "Guerrero",
-    13: "Hidalgo",
-    14: "Jalisco",
-    15: "Estado de México",
-    16: "Michoacán",
-    17: "Morelos",
-    18: "Nayarit",
-    19: "Nuevo León",
-    20: "Oaxaca",
-    21: "Puebla",
-    22: "Querétaro",
-    23: "Quintana Roo",
-    24: "San Luis Potosí",
-    25: "Sinaloa",
-    26: "Sonora",
-    27: "Tabasco",
-    28: "Tamaulipas",
-    29: "Tlaxcala",
-    30: "Veracruz",
-    31: "Yucatán",
-    32: "Zacatecas",
-}
-
 
+from cubo import (
+    edades_por_año,
+    intervalos_por_entidad,
+    residencia_por_entidad,
+    residencia_por_registro,
+    tasas_por_año,
+    tasas_por_entidad,
+    tasas_por_sexo,
+)
+from exportar import (
+    FORMATOS_ANIMACION,
+    FORMATOS_VALIDOS,
+    configurar_salidas,
+    en_paralelo,
+    exportar,
+    exportar_animacion,
+)
+from geo import cargar_geojson
+import instrumentacion
+from instrumentacion import etapa, medir
+from plantillas import (
+    PAPER_COLOR,
+    PLOT_COLOR,
+    barras_error,
+    crear_figura,
+    diseño_base,
+    eje_x,
+    eje_y,
+    leyenda,
+    pie_de_pagina,
+    tabla,
+)
+from poblacion import ENTIDADES
+
+
+# Las gráficas que se pueden crear desde la línea de comandos.
+OBJETIVOS = [
+    "tendencia",
+    "tendencia_mismo_sexo",
+    "tendencia_sexo_opuesto",
+    "edades_hombres",
+    "edades_mujeres",
+    "mapa",
+]
+
+# Los años de los mapas cuando no se indica otra cosa.
+AÑOS_MAPAS = [2010, 2017, 2023]
+
+# Carpeta de los reportes por entidad y el número de entidades
+# de residencia que se muestran en cada uno.
+CARPETA_REPORTES = "./reportes"
+FILAS_REPORTE = 16
+
+# El archivo con los intervalos de todas las tasas por entidad.
+RUTA_INTERVALOS = "./intervalos.csv"
+
+# Los nombres de las entidades de residencia, que además de las 32
+# entidades incluyen el extranjero y los registros sin especificar.
+RESIDENCIAS = {**ENTIDADES, 33: "Extranjero", 99: "No especificado"}
+
+
+@medir
 def tendencia():
     """
     Crea una gráfica de barras con la evolución de matrimonios entre parejas del mismo sexo.
     """
 
-    # Cargamos la población adulta de hombres.
-    pop_hombres = pd.read_csv(
-        "./assets/poblacion_adulta/hombres.csv",
-        index_col=0,
-    )
+    df = tasas_por_sexo()
 
-    # Seleccionamos la primera fila (nacional).
-    pop_hombres = pop_hombres.iloc[0]
-    pop_hombres.index = pop_hombres.index.astype(int)
+    etapa("figura")
 
-    # Cargamos la población adulta de mujeres.
-    pop_mujers = pd.read_csv(
-        "./assets/poblacion_adulta/mujeres.csv",
-        index_col=0,
-    )
+    fig = figura_tendencia(df)
 
-    # Seleccionamos la primera fila (nacional).
-    pop_mujers = pop_mujers.iloc[0]
-    pop_mujers.index = pop_mujers.index.astype(int)
+    etapa("exportacion")
 
-    # Cargamos el dataset de nupcialidad.
-    df = pd.read_csv("./data.csv")
+    exportar(fig, "./tendencia.png")
 
-    # Seleccionamos matrimonios entre parejas del mismo sexo.
-    df = df[df["SEXO_CON1"] == df["SEXO_CON2"]]
 
-    # Creamos un DataFrame con los registros de hombres.
-    hombres = (
-        df[df["SEXO_CON1"] == 1]["ANIO_REGIS"]
-        .value_counts()
-        .sort_index()
-        .to_frame("total")
-    )
+def figura_tendencia(df):
+    """
+    Crea la figura de barras con la evolución de matrimonios entre parejas del mismo sexo.
 
-    # Creamos un DataFrame con los registros de mujeres.
-    mujeres = (
-        df[df["SEXO_CON1"] == 2]["ANIO_REGIS"]
-        .value_counts()
-        .sort_index()
-        .to_frame("total")
-    )
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Los registros y tasas por año y sexo, como los regresa tasas_por_sexo().
+
+    Returns
+    -------
+    dict
+        La figura.
 
-    # Agregamos la población al DataFrame de hombres y calculamos la tasa por cada 100,000.
-    hombres["poblacion"] = pop_hombres
-    hombres["tasa"] = hombres["total"] / hombres["poblacion"] * 100000
+    """
+
+    # Separamos los registros de hombres y de mujeres.
+    hombres = df[df["sexo"] == 1].set_index("año")
+    mujeres = df[df["sexo"] == 2].set_index("año")
 
     # Le damos formato a los textos que irán arriba de cada barra.
     hombres["texto"] = hombres.apply(
         lambda x: f"{x['tasa']:,.2f}<br>({x['total']:,.0f})", axis=1
     )
 
-    # Agregamos la población al DataFrame de mujeres y calculamos la tasa por cada 100,000.
-    mujeres["poblacion"] = pop_mujers
-    mujeres["tasa"] = mujeres["total"] / mujeres["poblacion"] * 100000
-
-    # Le damos formato a los textos que irán arriba de cada barra.
     mujeres["texto"] = mujeres.apply(
         lambda x: f"{x['tasa']:,.2f}<br>({x['total']:,.0f})", axis=1
     )
@@ -122,185 +117,101 @@ def tendencia():
     mujeres_total = (
         f"Total de matrimonios entre mujeres: <b>{mujeres['total'].sum():,.0f}</b>"
     )
-    gran_total = f"Total de matrimonios igualitarios: <b>{len(df):,.0f}</b>"
+    gran_total = f"Total de matrimonios igualitarios: <b>{df['total'].sum():,.0f}</b>"
 
-    nota = f"<b>Notas:</b><br>Las tasas se calcularon con la población estimada de<br>hombres y mujeres mayores de edad para cada año.<br><br>{hombres_total}<br>{mujeres_total}<br>{gran_total}"
+    nota = f"<b>Notas:</b><br>Las tasas se calcularon con la población estimada de<br>hombres y mujeres mayores de edad para cada año.<br>Las líneas indican el intervalo de confianza del 95%.<br><br>{hombres_total}<br>{mujeres_total}<br>{gran_total}"
 
     # Vamos a crear dos gráficas de barras paralelas, una para hombres
     # y la otra para mujeres.
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Bar(
-            x=hombres.index,
-            y=hombres["tasa"],
-            text=hombres["texto"],
-            textposition="outside",
-            textfont_family="Oswald",
-            name="Hombre-Hombre",
-            marker_color="#009688",
-            marker_opacity=1.0,
-            marker_line_width=0,
-            textfont_size=13,
-        )
-    )
-
-    fig.add_trace(
-        go.Bar(
-            x=mujeres.index,
-            y=mujeres["tasa"],
-            text=mujeres["texto"],
-            textposition="outside",
-            textfont_family="Oswald",
-            name="Mujer-Mujer",
-            marker_color="#ffa726",
-            marker_opacity=1.0,
-            marker_line_width=0,
-            textfont_size=13,
-        )
-    )
-
-    fig.update_xaxes(
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
-
-    fig.update_yaxes(
-        range=[0, 9],
-        title="Tasa por cada 100,000 hombres/mujeres mayores de edad",
-        titlefont_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
-
-    fig.update_layout(
-        legend_title="Tipo de contrayentes",
-        legend_title_side="top center",
-        legend_itemsizing="constant",
-        legend_orientation="h",
-        legend_bordercolor="#FFFFFF",
-        legend_borderwidth=1,
-        showlegend=True,
-        legend_x=0.5,
-        legend_y=0.98,
-        legend_xanchor="center",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text="Evolución de las tasas de matrimonio igualitario en México según tipo de contrayentes",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=60,
-        margin_l=100,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor=PLOT_COLOR,
-        paper_bgcolor=PAPER_COLOR,
+    datos = [
+        {
+            "type": "bar",
+            "x": registros.index,
+            "y": registros["tasa"],
+            "text": registros["texto"],
+            "textposition": "outside",
+            "textfont": {"family": "Oswald", "size": 13},
+            "name": nombre,
+            "marker": {"color": color, "opacity": 1.0, "line": {"width": 0}},
+            "error_y": barras_error(registros),
+        }
+        for registros, nombre, color in [
+            (hombres, "Hombre-Hombre", "#009688"),
+            (mujeres, "Mujer-Mujer", "#ffa726"),
+        ]
+    ]
+
+    diseño = diseño_base(
+        "Evolución de las tasas de matrimonio igualitario en México según tipo de contrayentes",
+        xaxis=eje_x(),
+        yaxis=eje_y(
+            "Tasa por cada 100,000 hombres/mujeres mayores de edad", range=[0, 9]
+        ),
+        legend=leyenda(
+            0.5,
+            "center",
+            orientation="h",
+            title={"text": "Tipo de contrayentes", "side": "top center"},
+        ),
         annotations=[
-            dict(
-                x=0.02,
-                y=0.7,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                align="left",
-                text=nota,
-                bgcolor="#0F0F0F",
-                borderpad=7,
-                bordercolor="#FFFFFF",
-                borderwidth=1.5,
-                font_size=16,
-            ),
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: INEGI (EMAT, 2010-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año de registro del matrimonio",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
+            {
+                "x": 0.02,
+                "y": 0.7,
+                "xref": "paper",
+                "yref": "paper",
+                "xanchor": "left",
+                "yanchor": "top",
+                "align": "left",
+                "text": nota,
+                "bgcolor": "#0F0F0F",
+                "borderpad": 7,
+                "bordercolor": "#FFFFFF",
+                "borderwidth": 1.5,
+                "font": {"size": 16},
+            },
+            *pie_de_pagina("Fuente: INEGI (EMAT, 2010-2023)"),
         ],
     )
 
-    fig.write_image("./tendencia.png")
+    return crear_figura(datos, diseño)
 
 
+@medir
 def tendencia_mismo_sexo():
     """
     Crea una gráfica de linea mostrando la evolución de la tasa
     de matrimonios entre parejas del mismo sexo.
     """
 
-    # Cargamos la población adulta total.
-    pop = pd.read_csv(
-        "./assets/poblacion_adulta/total.csv",
-        index_col=0,
-    )
+    df = tasas_por_año(True)
 
-    # Seleccionamos la primera fila (nacional).
-    pop = pop.iloc[0]
-    pop.index = pop.index.astype(int)
+    etapa("figura")
 
-    # Cargamos el dataset de nupcilaidad.
-    df = pd.read_csv("./data.csv")
+    fig = figura_tendencia_mismo_sexo(df)
 
-    # Filtramos por matrimonios del mismo sexo y calculmos
-    # los registros por año.
-    df = (
-        df[df["SEXO_CON1"] == df["SEXO_CON2"]]["ANIO_REGIS"]
-        .value_counts()
-        .sort_index()
-        .to_frame("total")
-    )
+    etapa("exportacion")
+
+    exportar(fig, "./tendencia_mismo_sexo.png")
+
+
+def figura_tendencia_mismo_sexo(df):
+    """
+    Crea la figura de linea con la evolución de la tasa
+    de matrimonios entre parejas del mismo sexo.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Los registros y tasas por año, como los regresa tasas_por_año(True).
+
+    Returns
+    -------
+    dict
+        La figura.
 
-    # Agregamos la población y calculamos la tasa por cada 100,000 habitantes.
-    df["pop"] = pop
-    df["tasa"] = df["total"] / df["pop"] * 100000
+    """
 
-    # Calculamos el cambio porcentual.
-    df["change"] = df["total"].pct_change() * 100
-    df["change2"] = df["change"].apply(convert_change)
+    df = df.set_index("año")
 
     # Le damos format al texto que irá arriba de cada punto.
     df["texto"] = df.apply(
@@ -314,150 +225,76 @@ def tendencia_mismo_sexo():
     total = df["total"].sum()
     cambio = (df["tasa"].iloc[-1] - df["tasa"].iloc[0]) / df["tasa"].iloc[0] * 100
 
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["tasa"],
-            text=df["texto"],
-            textposition="top center",
-            mode="markers+lines+text",
-            name=f"Total acumulado: <b>{total:,.0f}</b><br>Crecimiento de la tasa: <b>{cambio:,.0f}%</b>",
-            line_color="#c6ff00",
-            marker_opacity=1.0,
-            line_width=7,
-            line_shape="spline",
-            line_smoothing=1.0,
-            marker_size=30,
-            textfont_size=20,
-        )
-    )
-
-    fig.update_xaxes(
-        range=[df.index.min() - 0.4, df.index.max() + 0.4],
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
-
-    fig.update_yaxes(
-        title="Tasa por cada 100,000 habitantes mayores de edad",
-        range=[None, df["tasa"].max() * 1.17],
-        titlefont_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
-
-    fig.update_layout(
-        legend_itemsizing="constant",
-        legend_borderwidth=1,
-        legend_bordercolor="#FFFFFF",
-        showlegend=True,
-        legend_x=0.01,
-        legend_y=0.98,
-        legend_xanchor="left",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text="Evolución de la tasa de matrimonio entre parejas del <b>mismo sexo</b> en México (2010-2023)",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=60,
-        margin_l=100,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor=PLOT_COLOR,
-        paper_bgcolor=PAPER_COLOR,
-        annotations=[
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: INEGI (EMAT, 2010-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año de registro del matrimonio",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
-        ],
+    datos = [
+        {
+            "type": "scatter",
+            "x": df.index,
+            "y": df["tasa"],
+            "text": df["texto"],
+            "textposition": "top center",
+            "mode": "markers+lines+text",
+            "name": f"Total acumulado: <b>{total:,.0f}</b><br>Crecimiento de la tasa: <b>{cambio:,.0f}%</b>",
+            "line": {
+                "color": "#c6ff00",
+                "width": 7,
+                "shape": "spline",
+                "smoothing": 1.0,
+            },
+            "marker": {"opacity": 1.0, "size": 30},
+            "textfont": {"size": 20},
+        }
+    ]
+
+    diseño = diseño_base(
+        "Evolución de la tasa de matrimonio entre parejas del <b>mismo sexo</b> en México (2010-2023)",
+        xaxis=eje_x(range=[df.index.min() - 0.4, df.index.max() + 0.4]),
+        yaxis=eje_y(
+            "Tasa por cada 100,000 habitantes mayores de edad",
+            range=[None, df["tasa"].max() * 1.17],
+        ),
+        legend=leyenda(0.01, "left"),
+        annotations=pie_de_pagina("Fuente: INEGI (EMAT, 2010-2023)"),
     )
 
-    fig.write_image("./tendencia_mismo_sexo.png")
+    return crear_figura(datos, diseño)
 
 
+@medir
 def tendencia_sexo_opuesto():
     """
     Crea una gráfica de linea mostrando la evolución de la tasa
     de matrimonios entre parejas del sexo opuesto.
     """
 
-    # Cargamos la población adulta total.
-    pop = pd.read_csv(
-        "./assets/poblacion_adulta/total.csv",
-        index_col=0,
-    )
+    df = tasas_por_año(False)
 
-    # Seleccionamos la primera fila (nacional).
-    pop = pop.iloc[0]
-    pop.index = pop.index.astype(int)
+    etapa("figura")
 
-    # Cargamos el dataset de nupcilaidad.
-    df = pd.read_csv("./data.csv")
+    fig = figura_tendencia_sexo_opuesto(df)
 
-    # Filtramos por matrimonios del sexo opuesto y calculmos
-    # los registros por año.
-    df = (
-        df[df["SEXO_CON1"] != df["SEXO_CON2"]]["ANIO_REGIS"]
-        .value_counts()
-        .sort_index()
-        .to_frame("total")
-    )
+    etapa("exportacion")
+
+    exportar(fig, "./tendencia_sexo_opuesto.png")
+
+
+def figura_tendencia_sexo_opuesto(df):
+    """
+    Crea la figura de linea con la evolución de la tasa
+    de matrimonios entre parejas del sexo opuesto.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Los registros y tasas por año, como los regresa tasas_por_año(False).
+
+    Returns
+    -------
+    dict
+        La figura.
 
-    # Agregamos la población y calculamos la tasa por cada 100,000 habitantes.
-    df["pop"] = pop
-    df["tasa"] = df["total"] / df["pop"] * 100000
+    """
 
-    # Calculamos el cambio porcentual.
-    df["change"] = df["total"].pct_change() * 100
-    df["change2"] = df["change"].apply(convert_change)
+    df = df.set_index("año")
 
     # Le damos format al texto que irá arriba de cada punto.
     df["texto"] = df.apply(
@@ -469,590 +306,422 @@ def tendencia_sexo_opuesto():
     total = df["total"].sum()
     cambio = (df["tasa"].iloc[-1] - df["tasa"].iloc[0]) / df["tasa"].iloc[0] * 100
 
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["tasa"],
-            text=df["texto"],
-            textposition="top center",
-            mode="markers+lines+text",
-            name=f"Total acumulado: <b>{total:,.0f}</b><br>Crecimiento de la tasa: <b>{cambio:,.0f}%</b>",
-            line_color="#69caff",
-            marker_opacity=1.0,
-            line_width=7,
-            line_shape="spline",
-            line_smoothing=1.0,
-            marker_size=30,
-            textfont_size=20,
-        )
-    )
-
-    fig.update_xaxes(
-        range=[df.index.min() - 0.5, df.index.max() + 0.5],
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
-
-    fig.update_yaxes(
-        title="Tasa por cada 100,000 habitantes mayores de edad",
-        range=[None, df["tasa"].max() * 1.12],
-        titlefont_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
-
-    fig.update_layout(
-        legend_itemsizing="constant",
-        legend_borderwidth=1,
-        legend_bordercolor="#FFFFFF",
-        showlegend=True,
-        legend_x=0.99,
-        legend_y=0.98,
-        legend_xanchor="right",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text="Evolución de la tasa de matrimonio entre parejas del <b>sexo opuesto</b> en México (2010-2023)",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=60,
-        margin_l=100,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor=PLOT_COLOR,
-        paper_bgcolor=PAPER_COLOR,
-        annotations=[
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: INEGI (EMAT, 2010-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año de registro del matrimonio",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
-        ],
+    datos = [
+        {
+            "type": "scatter",
+            "x": df.index,
+            "y": df["tasa"],
+            "text": df["texto"],
+            "textposition": "top center",
+            "mode": "markers+lines+text",
+            "name": f"Total acumulado: <b>{total:,.0f}</b><br>Crecimiento de la tasa: <b>{cambio:,.0f}%</b>",
+            "line": {
+                "color": "#69caff",
+                "width": 7,
+                "shape": "spline",
+                "smoothing": 1.0,
+            },
+            "marker": {"opacity": 1.0, "size": 30},
+            "textfont": {"size": 20},
+        }
+    ]
+
+    diseño = diseño_base(
+        "Evolución de la tasa de matrimonio entre parejas del <b>sexo opuesto</b> en México (2010-2023)",
+        xaxis=eje_x(range=[df.index.min() - 0.5, df.index.max() + 0.5]),
+        yaxis=eje_y(
+            "Tasa por cada 100,000 habitantes mayores de edad",
+            range=[None, df["tasa"].max() * 1.12],
+        ),
+        legend=leyenda(0.99, "right"),
+        annotations=pie_de_pagina("Fuente: INEGI (EMAT, 2010-2023)"),
     )
 
-    fig.write_image("./tendencia_sexo_opuesto.png")
-
-
-def convert_change(change):
-    """
-    Le da formato al cambio porcentual.
-    """
-
-    if change >= 0:
-        return f"+{change:,.2f}%"
-    elif change < 0:
-        return f"{change:,.2f}%"
-
-    return "---"
+    return crear_figura(datos, diseño)
 
 
+@medir
 def edades_hombres():
     """
     Crea gráficas de linea con la evolución de la edad promedio
     de hombres al momento de casarse.
     """
 
-    # Cargamos el dataset de nupcialidad.
-    df = pd.read_csv("./data.csv")
+    df = edades_por_año(1)
 
-    # Quitamos registros inválidos.
-    df = df[df["EDAD_CON1"] != 99]
-    df = df[df["EDAD_CON2"] != 99]
+    etapa("figura")
 
-    # Creamos dos DataFrame para cada tipo de matrimonio.
-    opuesto = df[(df["SEXO_CON1"] == 1) & (df["SEXO_CON2"] == 2)]
-    igualitario = df[(df["SEXO_CON1"] == 1) & (df["SEXO_CON2"] == 1)]
+    fig = figura_edades_hombres(df)
 
-    # Calcularemos datos para cada año y los guardaremos aquí.
-    data = list()
+    etapa("exportacion")
 
-    # Iteramos para cada año.
-    for año in df["ANIO_REGIS"].unique():
-        temp_opuesto = opuesto[opuesto["ANIO_REGIS"] == año]
+    exportar(fig, "./edades_hombres.png")
 
-        # Calculamos la edad promedio de hombres en matrimonios del sexo opuesto.
-        edad_opuesto = temp_opuesto["EDAD_CON1"].mean()
 
-        temp_igualitario = igualitario[igualitario["ANIO_REGIS"] == año]
+def figura_edades_hombres(df):
+    """
+    Crea la figura con la evolución de la edad promedio
+    de hombres al momento de casarse.
 
-        # Para calcular la edad promedio en matrimonios del mismo sexo debemos
-        # tomar las edades de ambos contrayentes.
-        edad_igualitario = np.concatenate(
-            [temp_igualitario["EDAD_CON1"], temp_igualitario["EDAD_CON2"]]
-        ).mean()
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Las edades por año y tipo de matrimonio, como las regresa edades_por_año(1).
 
-        # Agregamos los valores calculados a nuestra lista de datos.
-        data.append(
-            {
-                "año": año,
-                "edad_opuesto": edad_opuesto,
-                "edad_igualitario": edad_igualitario,
-            }
-        )
+    Returns
+    -------
+    dict
+        La figura.
 
-    # COnvertimos la lista a un DataFrame.
-    df = pd.DataFrame.from_records(data, index="año")
+    """
 
-    # Vamos a crear dos gráficas de líneas pero solo mostrando los puntos.
-    # Así mismo, agregaremos los textos por nuestra cuenta para poder ajustar
-    # # mejor su posición vertical.
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_opuesto"],
-            mode="markers",
-            name="Matrimonio con pareja del sexo opuesto",
-            marker_color="#33691e",
-            marker_symbol="circle",
-            marker_size=50,
-            marker_line_width=3,
-            marker_line_color="#FFFFFF",
-        )
-    )
+    df = df.pivot(index="año", columns="tipo", values="media")
 
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_opuesto"] * 0.996,
-            text=df["edad_opuesto"],
-            texttemplate="%{text:,.1f}",
-            mode="text",
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=22,
-            showlegend=False,
-        )
+    df = df.rename(
+        columns={"opuesto": "edad_opuesto", "igualitario": "edad_igualitario"}
     )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_igualitario"],
-            mode="markers",
-            name="Matrimonio con pareja del mismo sexo",
-            marker_color="#1565c0",
-            marker_symbol="diamond",
-            marker_size=50,
-            marker_line_width=3,
-            marker_line_color="#FFFFFF",
+    # Vamos a crear dos gráficas de líneas pero solo mostrando los puntos.
+    # Así mismo, agregaremos los textos por nuestra cuenta para poder ajustar
+    # # mejor su posición vertical.
+    datos = list()
+
+    for columna, nombre, color, simbolo in [
+        ("edad_opuesto", "Matrimonio con pareja del sexo opuesto", "#33691e", "circle"),
+        (
+            "edad_igualitario",
+            "Matrimonio con pareja del mismo sexo",
+            "#1565c0",
+            "diamond",
+        ),
+    ]:
+        datos.append(
+            {
+                "type": "scatter",
+                "x": df.index,
+                "y": df[columna],
+                "mode": "markers",
+                "name": nombre,
+                "marker": {
+                    "color": color,
+                    "symbol": simbolo,
+                    "size": 50,
+                    "line": {"width": 3, "color": "#FFFFFF"},
+                },
+            }
         )
-    )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_igualitario"] * 0.996,
-            text=df["edad_igualitario"],
-            texttemplate="%{text:,.1f}",
-            mode="text",
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=22,
-            showlegend=False,
+        datos.append(
+            {
+                "type": "scatter",
+                "x": df.index,
+                "y": df[columna] * 0.996,
+                "text": df[columna],
+                "texttemplate": "%{text:,.1f}",
+                "mode": "text",
+                "textfont": {"color": "#FFFFFF", "family": "Oswald", "size": 22},
+                "showlegend": False,
+            }
         )
-    )
 
-    fig.update_xaxes(
-        range=[df.index.min() - 0.6, df.index.max() + 0.6],
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
-
-    fig.update_yaxes(
-        title="Edad promedio al momento de contraer matrimonio",
-        range=[df["edad_opuesto"].min() - 5, df["edad_igualitario"].max() + 5],
-        titlefont_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
-
-    fig.update_layout(
-        legend_itemsizing="constant",
-        legend_borderwidth=1,
-        legend_bordercolor="#FFFFFF",
-        showlegend=True,
-        legend_x=0.5,
-        legend_y=0.98,
-        legend_xanchor="center",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text="Evolución de la edad promedio de <b>hombres</b> al momento de contraer matrimonio en México",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=60,
-        margin_l=100,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor=PLOT_COLOR,
-        paper_bgcolor=PAPER_COLOR,
-        annotations=[
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: INEGI (EMAT, 2010-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año de registro del matrimonio",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
-        ],
+    diseño = diseño_base(
+        "Evolución de la edad promedio de <b>hombres</b> al momento de contraer matrimonio en México",
+        xaxis=eje_x(range=[df.index.min() - 0.6, df.index.max() + 0.6]),
+        yaxis=eje_y(
+            "Edad promedio al momento de contraer matrimonio",
+            range=[df["edad_opuesto"].min() - 5, df["edad_igualitario"].max() + 5],
+        ),
+        legend=leyenda(0.5, "center"),
+        annotations=pie_de_pagina("Fuente: INEGI (EMAT, 2010-2023)"),
     )
 
-    fig.write_image("./edades_hombres.png")
+    return crear_figura(datos, diseño)
 
 
+@medir
 def edades_mujeres():
     """
     Crea gráficas de linea con la evolución de la edad promedio
     de mujeres al momento de casarse.
     """
 
-    # Cargamos el dataset de nupcialidad.
-    df = pd.read_csv("./data.csv")
+    df = edades_por_año(2)
 
-    # Quitamos registros inválidos.
-    df = df[df["EDAD_CON1"] != 99]
-    df = df[df["EDAD_CON2"] != 99]
+    etapa("figura")
 
-    # Creamos dos DataFrame para cada tipo de matrimonio.
-    opuesto = df[(df["SEXO_CON1"] == 1) & (df["SEXO_CON2"] == 2)]
-    igualitario = df[(df["SEXO_CON1"] == 2) & (df["SEXO_CON2"] == 2)]
+    fig = figura_edades_mujeres(df)
 
-    # Calcularemos datos para cada año y los guardaremos aquí.
-    data = list()
+    etapa("exportacion")
 
-    # Iteramos para cada año.
-    for año in df["ANIO_REGIS"].unique():
-        temp_opuesto = opuesto[opuesto["ANIO_REGIS"] == año]
+    exportar(fig, "./edades_mujeres.png")
 
-        # Calculamos la edad promedio de mujeres en matrimonios del sexo opuesto.
-        edad_opuesto = temp_opuesto["EDAD_CON2"].mean()
 
-        temp_igualitario = igualitario[igualitario["ANIO_REGIS"] == año]
+def figura_edades_mujeres(df):
+    """
+    Crea la figura con la evolución de la edad promedio
+    de mujeres al momento de casarse.
 
-        # Para calcular la edad promedio en matrimonios del mismo sexo debemos
-        # tomar las edades de ambos contrayentes.
-        edad_igualitario = np.concatenate(
-            [temp_igualitario["EDAD_CON1"], temp_igualitario["EDAD_CON2"]]
-        ).mean()
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Las edades por año y tipo de matrimonio, como las regresa edades_por_año(2).
 
-        # Agregamos los valores calculados a nuestra lista de datos.
-        data.append(
-            {
-                "año": año,
-                "edad_opuesto": edad_opuesto,
-                "edad_igualitario": edad_igualitario,
-            }
-        )
+    Returns
+    -------
+    dict
+        La figura.
+
+    """
+
+    df = df.pivot(index="año", columns="tipo", values="media")
 
-    # COnvertimos la lista a un DataFrame.
-    df = pd.DataFrame.from_records(data, index="año")
+    df = df.rename(
+        columns={"opuesto": "edad_opuesto", "igualitario": "edad_igualitario"}
+    )
 
     # Vamos a crear dos gráficas de líneas pero solo mostrando los puntos.
     # Así mismo, agregaremos los textos por nuestra cuenta para poder ajustar
     # # mejor su posición vertical.
-    fig = go.Figure()
-
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_opuesto"],
-            mode="markers",
-            name="Matrimonio con pareja del sexo opuesto",
-            marker_color="#f50057",
-            marker_symbol="circle",
-            marker_size=50,
-            marker_line_width=3,
-            marker_line_color="#FFFFFF",
+    datos = list()
+
+    for columna, nombre, color, simbolo in [
+        ("edad_opuesto", "Matrimonio con pareja del sexo opuesto", "#f50057", "circle"),
+        (
+            "edad_igualitario",
+            "Matrimonio con pareja del mismo sexo",
+            "#7b1fa2",
+            "diamond",
+        ),
+    ]:
+        datos.append(
+            {
+                "type": "scatter",
+                "x": df.index,
+                "y": df[columna],
+                "mode": "markers",
+                "name": nombre,
+                "marker": {
+                    "color": color,
+                    "symbol": simbolo,
+                    "size": 50,
+                    "line": {"width": 3, "color": "#FFFFFF"},
+                },
+            }
         )
-    )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_opuesto"] * 0.996,
-            text=df["edad_opuesto"],
-            texttemplate="%{text:,.1f}",
-            mode="text",
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=22,
-            showlegend=False,
+        datos.append(
+            {
+                "type": "scatter",
+                "x": df.index,
+                "y": df[columna] * 0.996,
+                "text": df[columna],
+                "texttemplate": "%{text:,.1f}",
+                "mode": "text",
+                "textfont": {"color": "#FFFFFF", "family": "Oswald", "size": 22},
+                "showlegend": False,
+            }
         )
-    )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_igualitario"],
-            mode="markers",
-            name="Matrimonio con pareja del mismo sexo",
-            marker_color="#7b1fa2",
-            marker_symbol="diamond",
-            marker_size=50,
-            marker_line_width=3,
-            marker_line_color="#FFFFFF",
-        )
+    diseño = diseño_base(
+        "Evolución de la edad promedio de <b>mujeres</b> al momento de contraer matrimonio en México",
+        xaxis=eje_x(range=[df.index.min() - 0.6, df.index.max() + 0.6]),
+        yaxis=eje_y(
+            "Edad promedio al momento de contraer matrimonio",
+            range=[df["edad_opuesto"].min() - 5, df["edad_igualitario"].max() + 5],
+        ),
+        legend=leyenda(0.5, "center"),
+        annotations=pie_de_pagina("Fuente: INEGI (EMAT, 2010-2023)"),
     )
 
-    fig.add_trace(
-        go.Scatter(
-            x=df.index,
-            y=df["edad_igualitario"] * 0.996,
-            text=df["edad_igualitario"],
-            texttemplate="%{text:,.1f}",
-            mode="text",
-            textfont_color="#FFFFFF",
-            textfont_family="Oswald",
-            textfont_size=22,
-            showlegend=False,
-        )
-    )
+    return crear_figura(datos, diseño)
 
-    fig.update_xaxes(
-        range=[df.index.min() - 0.6, df.index.max() + 0.6],
-        ticks="outside",
-        ticklen=10,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showline=True,
-        showgrid=True,
-        gridwidth=0.35,
-        mirror=True,
-        nticks=15,
-    )
 
-    fig.update_yaxes(
-        title="Edad promedio al momento de contraer matrimonio",
-        range=[df["edad_opuesto"].min() - 5, df["edad_igualitario"].max() + 5],
-        titlefont_size=20,
-        ticks="outside",
-        zeroline=False,
-        separatethousands=True,
-        ticklen=10,
-        title_standoff=6,
-        tickcolor="#FFFFFF",
-        linewidth=2,
-        showgrid=True,
-        gridwidth=0.35,
-        showline=True,
-        nticks=20,
-        mirror=True,
-    )
+@medir
+def mapa_entidades(año):
+    """
+    Crea un mapa con los registros de matrimonios igualitarios por entidad.
 
-    fig.update_layout(
-        legend_itemsizing="constant",
-        legend_borderwidth=1,
-        legend_bordercolor="#FFFFFF",
-        showlegend=True,
-        legend_x=0.5,
-        legend_y=0.98,
-        legend_xanchor="center",
-        legend_yanchor="top",
-        width=1280,
-        height=720,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        font_size=18,
-        title_text="Evolución de la edad promedio de <b>mujeres</b> al momento de contraer matrimonio en México",
-        title_font_size=24,
-        title_x=0.5,
-        title_y=0.965,
-        margin_t=60,
-        margin_l=100,
-        margin_r=40,
-        margin_b=90,
-        plot_bgcolor=PLOT_COLOR,
-        paper_bgcolor=PAPER_COLOR,
-        annotations=[
-            dict(
-                x=0.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="left",
-                yanchor="top",
-                text="Fuente: INEGI (EMAT, 2010-2023)",
-            ),
-            dict(
-                x=0.5,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="center",
-                yanchor="top",
-                text="Año de registro del matrimonio",
-            ),
-            dict(
-                x=1.01,
-                y=-0.14,
-                xref="paper",
-                yref="paper",
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-            ),
-        ],
-    )
+    Parameters
+    ----------
+    año : int
+        El año que se desea graficar.
 
-    fig.write_image("./edades_mujeres.png")
+    """
 
+    mapa_entidades_lote([año])
 
-def mapa_entidades(año):
+
+@medir
+def mapa_entidades_lote(años):
     """
-    Crea un mapa con los registros de matrimonios igualitarios por entidad.
+    Crea los mapas de varios años. El GeoJSON y los registros
+    por entidad se cargan y calculan una sola vez.
+
+    Parameters
+    ----------
+    años : list
+        Los años que se desean graficar.
+
+    """
+
+    df = tasas_por_entidad(años)
+
+    etapa("carga")
+
+    # Cargamos el GeoJSON de México, simplificado para el tamaño de nuestros mapas.
+    geojson = cargar_geojson()
+
+    for año in años:
+        etapa("figura")
+
+        figuras = figuras_mapa(año, df[df["año"] == año], geojson)
+
+        etapa("exportacion")
+
+        # Unimos el mapa y las tablas en una sola imagen.
+        exportar(figuras, f"./mapa_{año}.png")
+
+
+def figuras_mapa(año, df, geojson):
+    """
+    Crea el mapa de un año con los registros de matrimonios igualitarios
+    por entidad y las tablas que van debajo de él.
 
     Parameters
     ----------
     año : int
         El año que se desea graficar.
 
+    df : pandas.DataFrame
+        Los registros y tasas del año por entidad, como los regresa tasas_por_entidad().
+
+    geojson : dict
+        El GeoJSON de México.
+
+    Returns
+    -------
+    list
+        La figura del mapa y la figura de las tablas.
+
     """
 
-    # Cargamos la población adulta total.
-    pop = pd.read_csv(
-        "./assets/poblacion_adulta/total.csv",
-        index_col=0,
-    )
+    nacional, df = separar_nacional(df)
 
-    # Seleccionamos la población del año de nuestro interés.
-    pop = pop[str(año)]
+    # Guardamos el mapa para unirlo después con las tablas.
+    mapa = figura_mapa(año, nacional, df, geojson)
 
-    # Ajustamos el nombre del Estado de México.
-    pop.index = pop.index.map(lambda x: x if x != "México" else "Estado de México")
+    # Vamos a crear dos tablas, cada una con la información de 16 entidades.
+    encabezados = [
+        "<b>Entidad</b>",
+        "<b>♂-♂</b>",
+        "<b>♀-♀</b>",
+        "<b>Total</b>",
+        "<b>Tasa ↓</b>",
+        "<b>IC 95%</b>",
+    ]
+
+    # El intervalo de confianza exacto de cada tasa.
+    intervalos = [
+        f"{inferior:,.2f} – {superior:,.2f}"
+        for inferior, superior in zip(df["tasa_inf"], df["tasa_sup"])
+    ]
+
+    datos = [
+        tabla(
+            encabezados,
+            [
+                df.index[filas],
+                df["hombres"][filas],
+                df["mujeres"][filas],
+                df["total"][filas],
+                df["tasa"][filas],
+                intervalos[filas],
+            ],
+            ["", ",.0f", ",.0f", ",.0f", ",.2f", ""],
+            columnwidth=[190, 60, 60, 70, 75, 130],
+            domain={"x": dominio, "y": [0.0, 1.0]},
+        )
+        for filas, dominio in [
+            (slice(None, 16), [0.0, 0.485]),
+            (slice(16, None), [0.515, 1.0]),
+        ]
+    ]
 
-    # Cargamos el dataset de nupcialidad.
-    df = pd.read_csv("./data.csv")
+    diseño = {
+        "showlegend": False,
+        "width": 1280,
+        "height": 560,
+        "font": {"family": "Lato", "color": "#FFFFFF", "size": 18},
+        "margin": {"t": 20, "l": 40, "r": 40, "b": 0},
+        "paper_bgcolor": PAPER_COLOR,
+    }
 
-    # Filtramos por el año de nuestro interés.
-    df = df[df["ANIO_REGIS"] == año]
+    return [mapa, crear_figura(datos, diseño)]
 
-    # Creamos un DataFrame con los registros de hombres.
-    hombres = (
-        df[(df["SEXO_CON1"] == 1) & (df["SEXO_CON2"] == 1)]["ENT_REGIS"]
-        .value_counts()
-        .to_frame("hombres")
-    )
 
-    # Creamos un DataFrame con los registros de mujeres.
-    mujeres = (
-        df[(df["SEXO_CON1"] == 2) & (df["SEXO_CON2"] == 2)]["ENT_REGIS"]
-        .value_counts()
-        .to_frame("mujeres")
-    )
+def separar_nacional(df):
+    """
+    Separa el total nacional de las entidades de un año.
 
-    # Hay estados sin registros, lo cual puede causar ambigüedad.
-    # Creamos un DataFrame con valores en cero para arreglar esto.
-    dummy = pd.DataFrame(index=list(ENTIDADES.keys()), columns=["total"], data=0)
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Los registros y tasas del año por entidad, como los regresa tasas_por_entidad().
 
-    # Unimos ambos DataFrames.
-    df = pd.concat([hombres, mujeres, dummy], axis=1).fillna(0)
+    Returns
+    -------
+    pandas.Series
+        Los registros y la tasa nacional.
 
-    # Asignamos el nombre de la entidad.
-    df.index = df.index.map(ENTIDADES)
+    pandas.DataFrame
+        Los registros y tasas de las entidades, indexados por su nombre
+        y ordenados por tasa de mayor a menor.
 
-    # Calculamos el total por entidad.
-    df["total"] = df.sum(axis=1)
+    """
 
-    # Agregamos la población y calculamos la tasa por cada 100,000 habitantes.
-    df["poblacion"] = pop
-    df["tasa"] = df["total"] / df["poblacion"] * 100000
+    # Separamos el total nacional de las entidades.
+    nacional = df[df["entidad"] == 0].iloc[0]
+    df = df[df["entidad"] != 0].set_index("entidad")
+
+    # Asignamos el nombre de la entidad.
+    df.index = df.index.map(ENTIDADES)
 
     # ORdenamos por tasa, de mayor a menor.
     df = df.sort_values("tasa", ascending=False)
 
-    # Preparamos nuestro subtítulo calculando los valores a nivel naciconal.
-    total_nacional = df["total"].sum()
-    tasa_nacional = total_nacional / pop.iloc[0] * 100000
+    return nacional, df
+
 
-    subtitulo = f"Tasa nacional: <b>{tasa_nacional:,.1f}</b> (con <b>{total_nacional:,.0f}</b> registros)"
+def figura_mapa(año, nacional, df, geojson):
+    """
+    Crea el mapa de un año con las tasas de matrimonio igualitario por entidad.
+
+    Parameters
+    ----------
+    año : int
+        El año que se desea graficar.
+
+    nacional : pandas.Series
+        Los registros y la tasa nacional, como los regresa separar_nacional().
+
+    df : pandas.DataFrame
+        Las tasas de las entidades indexadas por su nombre, como las regresa
+        separar_nacional().
+
+    geojson : dict
+        El GeoJSON de México.
+
+    Returns
+    -------
+    dict
+        La figura del mapa.
+
+    """
+
+    from plotly.colors import get_colorscale
+
+    # Preparamos nuestro subtítulo con los valores a nivel naciconal.
+    subtitulo = f"Tasa nacional: <b>{nacional['tasa']:,.1f}</b> (con <b>{nacional['total']:,.0f}</b> registros)"
 
     # Determinamos los valores mínimos y máximos para nuestra escala.
     # Para el valor máximo usamos el 97.5 percentil para mitigar los
@@ -1075,9 +744,6 @@ def mapa_entidades(año):
     # A la última etiqueta le agregamos el símbolo de 'mayor o igual que'.
     etiquetas[-1] = f"≥{etiquetas[-1]}"
 
-    # Cargamos el GeoJSON de México.
-    geojson = json.load(open("./assets/mexico.json", "r", encoding="utf-8"))
-
     # Estas listas serán usadas para configurar el mapa Choropleth.    ubicaciones = list()
     valores = list()
     ubicaciones = list()
@@ -1091,226 +757,370 @@ def mapa_entidades(año):
         ubicaciones.append(geo)
         valores.append(df.loc[geo, "tasa"])
 
-    fig = go.Figure()
-
-    fig.add_traces(
-        go.Choropleth(
-            geojson=geojson,
-            locations=ubicaciones,
-            z=valores,
-            featureidkey="properties.NOMGEO",
-            colorscale="deep_r",
-            colorbar=dict(
-                x=0.03,
-                y=0.5,
-                ypad=50,
-                ticks="outside",
-                outlinewidth=2,
-                outlinecolor="#FFFFFF",
-                tickvals=marcas,
-                ticktext=etiquetas,
-                tickwidth=3,
-                tickcolor="#FFFFFF",
-                ticklen=10,
-                tickfont_size=20,
-            ),
-            marker_line_color="#FFFFFF",
-            marker_line_width=1.0,
-            zmin=valor_min,
-            zmax=valor_max,
-        )
-    )
+    # Sin los validadores la escala de colores debe ir resuelta, plotly.js
+    # no conoce los nombres de las escalas de Python.
+    datos = [
+        {
+            "type": "choropleth",
+            "geojson": geojson,
+            "locations": ubicaciones,
+            "z": valores,
+            "featureidkey": "properties.NOMGEO",
+            "colorscale": get_colorscale("deep_r"),
+            "colorbar": {
+                "x": 0.03,
+                "y": 0.5,
+                "ypad": 50,
+                "ticks": "outside",
+                "outlinewidth": 2,
+                "outlinecolor": "#FFFFFF",
+                "tickvals": marcas,
+                "ticktext": etiquetas,
+                "tickwidth": 3,
+                "tickcolor": "#FFFFFF",
+                "ticklen": 10,
+                "tickfont": {"size": 20},
+            },
+            "marker": {"line": {"color": "#FFFFFF", "width": 1.0}},
+            "zmin": valor_min,
+            "zmax": valor_max,
+        }
+    ]
+
+    # Las anotaciones del mapa: su posición, su texto, su tamaño y
+    # las propiedades adicionales de cada una.
+    anotaciones = [
+        (
+            0.5,
+            1.0,
+            "center",
+            "top",
+            f"Tasas de matrimonio igualitario en México durante el {año} por entidad de registro",
+            28,
+            {},
+        ),
+        (
+            0.0275,
+            0.45,
+            "center",
+            "middle",
+            "Tasa por cada 100,000 habitantes mayores de edad",
+            16,
+            {"textangle": -90},
+        ),
+        (0.58, -0.04, "center", "top", subtitulo, 22, {}),
+        (0.01, -0.04, "left", "top", f"Fuente: INEGI (EMAT, {año})", 22, {}),
+        (1.01, -0.04, "right", "top", "🧁 @lapanquecita", 22, {}),
+    ]
+
+    diseño = {
+        "showlegend": False,
+        "font": {"family": "Lato", "color": "#FFFFFF"},
+        "margin": {"t": 50, "r": 40, "b": 30, "l": 40},
+        "width": 1280,
+        "height": 720,
+        "paper_bgcolor": PAPER_COLOR,
+        "geo": {
+            "fitbounds": "geojson",
+            "showocean": True,
+            "oceancolor": PLOT_COLOR,
+            "showcountries": False,
+            "framecolor": "#FFFFFF",
+            "framewidth": 2,
+            "showlakes": False,
+            "coastlinewidth": 0,
+            "landcolor": "#1C0A00",
+        },
+        "annotations": [
+            {
+                "x": x,
+                "y": y,
+                "xanchor": xanchor,
+                "yanchor": yanchor,
+                "text": texto,
+                "font": {"size": tamaño},
+                **extra,
+            }
+            for x, y, xanchor, yanchor, texto, tamaño, extra in anotaciones
+        ],
+    }
 
-    fig.update_geos(
-        fitbounds="geojson",
-        showocean=True,
-        oceancolor=PLOT_COLOR,
-        showcountries=False,
-        framecolor="#FFFFFF",
-        framewidth=2,
-        showlakes=False,
-        coastlinewidth=0,
-        landcolor="#1C0A00",
-    )
+    return crear_figura(datos, diseño)
 
-    fig.update_layout(
-        showlegend=False,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        margin_t=50,
-        margin_r=40,
-        margin_b=30,
-        margin_l=40,
-        width=1280,
-        height=720,
-        paper_bgcolor=PAPER_COLOR,
-        annotations=[
-            dict(
-                x=0.5,
-                y=1.0,
-                xanchor="center",
-                yanchor="top",
-                text=f"Tasas de matrimonio igualitario en México durante el {año} por entidad de registro",
-                font_size=28,
-            ),
-            dict(
-                x=0.0275,
-                y=0.45,
-                textangle=-90,
-                xanchor="center",
-                yanchor="middle",
-                text="Tasa por cada 100,000 habitantes mayores de edad",
-                font_size=16,
-            ),
-            dict(
-                x=0.58,
-                y=-0.04,
-                xanchor="center",
-                yanchor="top",
-                text=subtitulo,
-                font_size=22,
-            ),
-            dict(
-                x=0.01,
-                y=-0.04,
-                xanchor="left",
-                yanchor="top",
-                text=f"Fuente: INEGI (EMAT, {año})",
-                font_size=22,
-            ),
-            dict(
-                x=1.01,
-                y=-0.04,
-                xanchor="right",
-                yanchor="top",
-                text="🧁 @lapanquecita",
-                font_size=22,
-            ),
-        ],
-    )
 
-    fig.write_image("./1.png")
+@medir
+def mapa_animado(años=None, videos=(), procesos=None):
+    """
+    Crea un solo mapa animado con las tasas de matrimonio igualitario
+    por entidad de todos los años, con un control para elegir el año.
 
-    # Vamos a crear dos tablas, cada una con la información de 16 entidades.
-    fig = make_subplots(
-        rows=1,
-        cols=2,
-        horizontal_spacing=0.03,
-        specs=[[{"type": "table"}, {"type": "table"}]],
-    )
+    Parameters
+    ----------
+    años : list
+        Los años que se desean graficar. Por defecto se usan todos.
 
-    fig.add_trace(
-        go.Table(
-            columnwidth=[160, 90],
-            header=dict(
-                values=[
-                    "<b>Entidad</b>",
-                    "<b>♂-♂</b>",
-                    "<b>♀-♀</b>",
-                    "<b>Total</b>",
-                    "<b>Tasa ↓</b>",
-                ],
-                font_color="#FFFFFF",
-                fill_color=HEADER_COLOR,
-                align="center",
-                height=29,
-                line_width=0.8,
-            ),
-            cells=dict(
-                values=[
-                    df.index[:16],
-                    df["hombres"][:16],
-                    df["mujeres"][:16],
-                    df["total"][:16],
-                    df["tasa"][:16],
-                ],
-                fill_color=PLOT_COLOR,
-                height=29,
-                format=["", ",.0f", ",.0f", ",.0f", ",.2f"],
-                line_width=0.8,
-                align=["left", "center"],
-            ),
-        ),
-        col=1,
-        row=1,
-    )
+    videos : list
+        Los formatos de video (gif o mp4) que se crean además del HTML.
 
-    fig.add_trace(
-        go.Table(
-            columnwidth=[160, 90],
-            header=dict(
-                values=[
-                    "<b>Entidad</b>",
-                    "<b>♂-♂</b>",
-                    "<b>♀-♀</b>",
-                    "<b>Total</b>",
-                    "<b>Tasa ↓</b>",
-                ],
-                font_color="#FFFFFF",
-                fill_color=HEADER_COLOR,
-                align="center",
-                height=29,
-                line_width=0.8,
-            ),
-            cells=dict(
-                values=[
-                    df.index[16:],
-                    df["hombres"][16:],
-                    df["mujeres"][16:],
-                    df["total"][16:],
-                    df["tasa"][16:],
+    procesos : int
+        El número de procesos para renderizar los cuadros del video.
+        Por defecto se usa uno por núcleo.
+
+    """
+
+    df = tasas_por_entidad(años)
+
+    etapa("carga")
+
+    geojson = cargar_geojson()
+
+    etapa("figura")
+
+    figura = figura_mapa_animado(df, geojson)
+
+    etapa("exportacion")
+
+    exportar_animacion(figura, "./mapa_animado.html", videos, procesos)
+
+
+def figura_mapa_animado(df, geojson):
+    """
+    Crea la figura del mapa animado. La geometría va una sola vez
+    en la figura y cada año es un cuadro con sus tasas, su escala
+    y sus anotaciones.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Los registros y tasas por año y entidad, como los regresa tasas_por_entidad().
+
+    geojson : dict
+        El GeoJSON de México.
+
+    Returns
+    -------
+    dict
+        La figura del primer año con los cuadros de todos los años.
+
+    """
+
+    figura = None
+    cuadros = list()
+
+    for año in sorted(df["año"].unique()):
+        nacional, entidades = separar_nacional(df[df["año"] == año])
+        mapa = figura_mapa(año, nacional, entidades, geojson)
+
+        # Las ubicaciones siguen el orden del GeoJSON, así que
+        # de cada año basta con los valores y la escala.
+        traza = mapa["data"][0]
+
+        cuadros.append(
+            {
+                "name": str(año),
+                "data": [
+                    {
+                        "z": traza["z"],
+                        "zmin": traza["zmin"],
+                        "zmax": traza["zmax"],
+                        "colorbar": traza["colorbar"],
+                    }
                 ],
-                fill_color=PLOT_COLOR,
-                height=29,
-                format=["", ",.0f", ",.0f", ",.0f", ",.2f"],
-                line_width=0.8,
-                align=["left", "center"],
-            ),
-        ),
-        col=2,
-        row=1,
-    )
+                "traces": [0],
+                "layout": {"annotations": mapa["layout"]["annotations"]},
+            }
+        )
+
+        if figura is None:
+            figura = mapa
+
+    figura["frames"] = cuadros
+
+    return figura
+
+
+@medir
+def reportes_entidades(entidades=None, años=None):
+    """
+    Crea un reporte por entidad de registro con la evolución de su tasa de
+    matrimonio igualitario y la entidad de residencia de los contrayentes.
+
+    Los registros de todas las entidades se calculan con una sola agrupación
+    y los reportes se exportan en paralelo si estamos dentro de en_paralelo().
+
+    Parameters
+    ----------
+    entidades : list
+        Las claves de las entidades. Por defecto se crean las 32.
+
+    años : list
+        Los años de la tabla de residencia. Por defecto se suman todos.
+
+    """
+
+    entidades = entidades or list(ENTIDADES.keys())
+
+    tasas = tasas_por_entidad()
+    residencias = residencia_por_registro(años)
+
+    os.makedirs(CARPETA_REPORTES, exist_ok=True)
+
+    for entidad in entidades:
+        etapa("figura")
+
+        figuras = figuras_reporte(
+            entidad,
+            tasas[tasas["entidad"] == entidad],
+            residencias[residencias["entidad"] == entidad],
+            años,
+        )
+
+        etapa("exportacion")
+
+        exportar(figuras, os.path.join(CARPETA_REPORTES, f"entidad_{entidad:02d}.png"))
+
+
+def figuras_reporte(entidad, tasas, residencias, años=None):
+    """
+    Crea las figuras del reporte de una entidad de registro.
 
-    fig.update_layout(
+    Parameters
+    ----------
+    entidad : int
+        La clave de la entidad de registro.
+
+    tasas : pandas.DataFrame
+        Los registros y tasas de la entidad por año, como los regresa tasas_por_entidad().
+
+    residencias : pandas.DataFrame
+        La residencia de los contrayentes de la entidad, como la regresa
+        residencia_por_registro().
+
+    años : list
+        Los años de la tabla de residencia, solo para el título.
+
+    Returns
+    -------
+    list
+        La gráfica de la tasa por año y la tabla de residencia.
+
+    """
+
+    nombre = ENTIDADES[entidad]
+    tasas = tasas.set_index("año")
+
+    # Le damos formato a los textos que irán arriba de cada barra.
+    texto = tasas.apply(lambda x: f"{x['tasa']:,.2f}<br>({x['total']:,.0f})", axis=1)
+
+    periodo = f"{tasas.index.min()}-{tasas.index.max()}"
+
+    datos = [
+        {
+            "type": "bar",
+            "x": tasas.index,
+            "y": tasas["tasa"],
+            "text": texto,
+            "textposition": "outside",
+            "textfont": {"family": "Oswald", "size": 13},
+            "marker": {"color": "#009688", "line": {"width": 0}},
+            "error_y": barras_error(tasas),
+        }
+    ]
+
+    diseño = diseño_base(
+        f"Evolución de la tasa de matrimonio igualitario en <b>{nombre}</b> (por entidad de registro)",
         showlegend=False,
-        legend_borderwidth=1.5,
-        xaxis_rangeslider_visible=False,
-        width=1280,
-        height=560,
-        font_family="Lato",
-        font_color="#FFFFFF",
-        font_size=18,
-        title="",
-        title_x=0.5,
-        title_y=0.95,
-        margin_t=20,
-        margin_l=40,
-        margin_r=40,
-        margin_b=0,
-        title_font_size=26,
-        paper_bgcolor=PAPER_COLOR,
+        xaxis=eje_x(),
+        yaxis=eje_y(
+            "Tasa por cada 100,000 habitantes mayores de edad",
+            range=[0, tasas["tasa"].max() * 1.2 or 1],
+        ),
+        annotations=pie_de_pagina(f"Fuente: INEGI (EMAT, {periodo})"),
     )
 
-    fig.write_image("./2.png")
+    # Guardamos la gráfica para unirla después con la tabla.
+    grafica = crear_figura(datos, diseño)
+
+    # Mostramos las entidades de residencia principales y juntamos las demás.
+    principales = residencias.iloc[:FILAS_REPORTE]
+    resto = residencias.iloc[FILAS_REPORTE:]
+
+    nombres = principales["residencia"].map(RESIDENCIAS).tolist()
+    totales = principales["total"].tolist()
+    porcentajes = principales["perc"].tolist()
+
+    if len(resto) > 0:
+        nombres.append("Otras entidades")
+        totales.append(resto["total"].sum())
+        porcentajes.append(resto["perc"].sum())
+
+    if años is None:
+        periodo_residencia = periodo
+    elif len(años) == 1:
+        periodo_residencia = f"{años[0]}"
+    else:
+        periodo_residencia = f"{min(años)}-{max(años)}"
+
+    datos = [
+        tabla(
+            [
+                "<b>Entidad de residencia</b>",
+                "<b>Contrayentes</b>",
+                "<b>Porcentaje ↓</b>",
+            ],
+            [nombres, totales, porcentajes],
+            ["", ",.0f", ",.2f"],
+            ["", "", "%"],
+            columnwidth=[200, 90, 90],
+        )
+    ]
+
+    diseño = {
+        "showlegend": False,
+        "width": 1280,
+        "height": 100 + 29 * (len(nombres) + 1),
+        "font": {"family": "Lato", "color": "#FFFFFF", "size": 18},
+        "title": {
+            "text": f"Residencia de los contrayentes del mismo sexo que se casaron en {nombre} ({periodo_residencia})",
+            "font": {"size": 22},
+            "x": 0.5,
+            "y": 0.97,
+        },
+        "margin": {"t": 60, "l": 40, "r": 40, "b": 0},
+        "paper_bgcolor": PAPER_COLOR,
+    }
+
+    return [grafica, crear_figura(datos, diseño)]
+
+
+@medir
+def tabla_intervalos(años=None, replicas=0, procesos=None):
+    """
+    Guarda los intervalos de confianza de las tasas de todos los años,
+    entidades y tipos de pareja en un archivo CSV.
+
+    Parameters
+    ----------
+    años : list
+        Los años que nos interesan. Por defecto se usan todos.
 
-    # Unimos el mapa y las tablas en una sola imagen.
-    image1 = Image.open("./1.png")
-    image2 = Image.open("./2.png")
+    replicas : int
+        El número de réplicas del bootstrap paramétrico. Si es 0 solo se
+        calcula el intervalo exacto.
 
-    result_width = 1280
-    result_height = image1.height + image2.height
+    procesos : int
+        El número de procesos para el bootstrap. Por defecto se usa uno por núcleo.
 
-    result = Image.new("RGB", (result_width, result_height))
-    result.paste(im=image1, box=(0, 0))
-    result.paste(im=image2, box=(0, image1.height))
+    """
 
-    result.save(f"./mapa_{año}.png")
+    df = intervalos_por_entidad(años, replicas, procesos)
 
-    # Borramos las imágenes originales.
-    os.remove("./1.png")
-    os.remove("./2.png")
+    etapa("exportacion")
 
+    df.to_csv(RUTA_INTERVALOS, index=False)
 
+
+@medir
 def residencia(año):
     """
     Compara la entidad de residencia contra la entidad de registro.
@@ -1322,43 +1132,251 @@ def residencia(año):
 
     """
 
-    # Cargamos el dataset de nupcialidad.
-    df = pd.read_csv("./data.csv")
+    etapa("transformacion")
 
-    # Filtramos por el año de nuestro interés.
-    df = df[df["ANIO_REGIS"] == año]
+    # Calculamos la residencia de quienes se registraron en la Ciudad de México.
+    df = residencia_por_entidad(año, 9).set_index("residencia").rename_axis(None)
+    df.index = df.index.map(ENTIDADES)
 
-    # Seleccionamos solo matrimonios del mismo sexo.
-    df = df[df["SEXO_CON1"] == df["SEXO_CON2"]]
+    print(df)
+    print(df["total"].sum())
 
-    # Limitamos por entidad de registro.
-    df = df[df["ENT_REGIS"] == 9]
 
-    # Nuestro índice sera la entidad de registro.
-    df.set_index("ENT_REGIS", inplace=True)
+def leer_rango(texto):
+    """
+    Interpreta los años indicados en la línea de comandos.
 
-    # Apilamos los datos de residencia de ambos contrayentes.
-    df = pd.concat([df["ENTRH_CON1"], df["ENTRH_CON2"]], axis=0)
+    Parameters
+    ----------
+    texto : str
+        Un año (2017), un rango (2015-2023) o una lista separada
+        por comas que puede incluir rangos (2010,2015-2017).
 
-    # Calculamos la frecuencia de registros y sus porcentajes.
-    df = df.value_counts().to_frame("total")
-    df["perc"] = df["total"] / df["total"].sum() * 100
-    df.index = df.index.map(ENTIDADES)
+    Returns
+    -------
+    list
+        Los años, en orden y sin repetir.
 
-    print(df)
-    print(df["total"].sum())
+    """
+
+    años = set()
+
+    try:
+        for parte in texto.split(","):
+            inicio, _, fin = parte.partition("-")
+            años.update(range(int(inicio), int(fin or inicio) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Años no válidos: {texto}")
+
+    if not años:
+        raise argparse.ArgumentTypeError(f"El rango no incluye ningún año: {texto}")
+
+    return sorted(años)
+
+
+def graficas(objetivos=OBJETIVOS, años=AÑOS_MAPAS, procesos=None):
+    """
+    Crea las gráficas seleccionadas y al final las exporta en paralelo.
+
+    Cada gráfica carga únicamente los agregados que necesita, así que
+    generar un solo mapa no calcula las tendencias ni las edades.
+
+    Parameters
+    ----------
+    objetivos : list
+        Las gráficas que se desean crear, con los nombres de OBJETIVOS.
+
+    años : list
+        Los años de los mapas.
+
+    procesos : int
+        El número de procesos para exportar. Por defecto se usa uno por núcleo.
+
+    """
+
+    funciones = {
+        "tendencia": tendencia,
+        "tendencia_mismo_sexo": tendencia_mismo_sexo,
+        "tendencia_sexo_opuesto": tendencia_sexo_opuesto,
+        "edades_hombres": edades_hombres,
+        "edades_mujeres": edades_mujeres,
+        "mapa": lambda: mapa_entidades_lote(años),
+    }
+
+    # Respetamos el orden de OBJETIVOS sin importar cómo se hayan indicado.
+    with en_paralelo(procesos):
+        for objetivo in OBJETIVOS:
+            if objetivo in objetivos:
+                funciones[objetivo]()
 
 
 if __name__ == "__main__":
-    tendencia()
-    tendencia_mismo_sexo()
-    tendencia_sexo_opuesto()
+    parser = argparse.ArgumentParser(
+        description="Crea las gráficas y tablas del matrimonio igualitario en México."
+    )
+
+    parser.add_argument(
+        "--mediciones",
+        help="Archivo JSON Lines donde se registran el tiempo y la memoria de cada etapa.",
+    )
+
+    # Las opciones de exportación que comparten las gráficas y los reportes.
+    salidas = argparse.ArgumentParser(add_help=False)
+
+    salidas.add_argument(
+        "--formatos",
+        nargs="+",
+        choices=FORMATOS_VALIDOS,
+        default=["png"],
+        help="Los formatos de cada imagen. Los raster salen de un solo renderizado.",
+    )
+
+    salidas.add_argument(
+        "--miniaturas",
+        nargs="+",
+        type=int,
+        default=[],
+        help="Los anchos en pixeles de las miniaturas de cada formato raster.",
+    )
+
+    salidas.add_argument(
+        "--cuantizar",
+        action="store_true",
+        help="Reduce los PNG a una paleta de 256 colores para que pesen menos.",
+    )
+
+    salidas.add_argument(
+        "--procesos",
+        type=int,
+        help="El número de procesos para exportar. Por defecto se usa uno por núcleo.",
+    )
+
+    subparsers = parser.add_subparsers(dest="comando")
+
+    parser_graficas = subparsers.add_parser(
+        "graficas", parents=[salidas], help="Crea las gráficas seleccionadas."
+    )
+
+    parser_graficas.add_argument(
+        "--solo",
+        nargs="+",
+        choices=OBJETIVOS,
+        default=OBJETIVOS,
+        help="Las gráficas que se desean crear. Por defecto se crean todas.",
+    )
+
+    parser_graficas.add_argument(
+        "--años",
+        type=leer_rango,
+        default=AÑOS_MAPAS,
+        help="Los años de los mapas, por ejemplo 2023, 2015-2023 o 2010,2017,2023.",
+    )
+
+    parser_residencia = subparsers.add_parser(
+        "residencia",
+        help="Compara la entidad de residencia contra la entidad de registro.",
+    )
 
-    edades_hombres()
-    edades_mujeres()
+    parser_residencia.add_argument(
+        "--años",
+        type=leer_rango,
+        default=[2017],
+        help="Los años que se desean analizar, por ejemplo 2017 o 2015-2023.",
+    )
+
+    parser_reportes = subparsers.add_parser(
+        "reportes",
+        parents=[salidas],
+        help="Crea un reporte de tasas y residencia por entidad de registro.",
+    )
+
+    parser_reportes.add_argument(
+        "--entidades",
+        type=leer_rango,
+        help="Las claves de las entidades, por ejemplo 9 o 1-32. Por defecto todas.",
+    )
+
+    parser_reportes.add_argument(
+        "--años",
+        type=leer_rango,
+        help="Los años de la tabla de residencia, por ejemplo 2023. Por defecto todos.",
+    )
+
+    parser_animacion = subparsers.add_parser(
+        "animacion",
+        help="Crea un solo mapa animado con las tasas por entidad de todos los años.",
+    )
+
+    parser_animacion.add_argument(
+        "--años",
+        type=leer_rango,
+        help="Los años del mapa, por ejemplo 2015-2023. Por defecto todos.",
+    )
 
-    mapa_entidades(2010)
-    mapa_entidades(2017)
-    mapa_entidades(2023)
+    parser_animacion.add_argument(
+        "--videos",
+        nargs="+",
+        choices=FORMATOS_ANIMACION,
+        default=[],
+        help="Los videos que se crean además del HTML. El MP4 requiere ffmpeg.",
+    )
+
+    parser_animacion.add_argument(
+        "--procesos",
+        type=int,
+        help="El número de procesos para renderizar los cuadros. Por defecto uno por núcleo.",
+    )
+
+    parser_intervalos = subparsers.add_parser(
+        "intervalos",
+        help="Guarda los intervalos de confianza de las tasas por entidad en un CSV.",
+    )
+
+    parser_intervalos.add_argument(
+        "--años",
+        type=leer_rango,
+        help="Los años, por ejemplo 2015-2023. Por defecto todos.",
+    )
+
+    parser_intervalos.add_argument(
+        "--replicas",
+        type=int,
+        default=0,
+        help="Las réplicas del bootstrap paramétrico. Por defecto solo el intervalo exacto.",
+    )
+
+    parser_intervalos.add_argument(
+        "--procesos",
+        type=int,
+        help="El número de procesos para el bootstrap. Por defecto uno por núcleo.",
+    )
 
-    residencia(2017)
+    args = parser.parse_args()
+
+    # Los procesos que exportan las figuras heredan la variable de entorno.
+    if args.mediciones:
+        os.environ["MEDICIONES"] = args.mediciones
+        instrumentacion.RUTA_MEDICIONES = args.mediciones
+
+    if args.comando == "graficas":
+        configurar_salidas(args.formatos, args.miniaturas, args.cuantizar)
+        graficas(args.solo, args.años, args.procesos)
+    elif args.comando == "reportes":
+        if args.entidades and not set(args.entidades) <= set(ENTIDADES):
+            parser_reportes.error("Las claves de las entidades van del 1 al 32.")
+
+        configurar_salidas(args.formatos, args.miniaturas, args.cuantizar)
+
+        with en_paralelo(args.procesos):
+            reportes_entidades(args.entidades, args.años)
+    elif args.comando == "animacion":
+        mapa_animado(args.años, args.videos, args.procesos)
+    elif args.comando == "intervalos":
+        tabla_intervalos(args.años, args.replicas, args.procesos)
+    elif args.comando == "residencia":
+        for año in args.años:
+            residencia(año)
+    else:
+        # Sin subcomando creamos todas las gráficas y la tabla de residencia de 2017.
+        graficas()
+        residencia(2017)
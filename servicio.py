@@ -0,0 +1,716 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from cubo import (
+    edades_por_año,
+    intervalos_por_entidad,
+    residencia_por_registro,
+    tasas_por_año,
+    tasas_por_entidad,
+    tasas_por_sexo,
+)
+from exportar import codificar, componer, iniciar_kaleido, renderizar
+from geo import RUTA_GEOJSON, cargar_geojson
+from poblacion import ENTIDADES
+from script import (
+    figura_edades_hombres,
+    figura_edades_mujeres,
+    figura_tendencia,
+    figura_tendencia_mismo_sexo,
+    figura_tendencia_sexo_opuesto,
+    figuras_mapa,
+    figuras_reporte,
+    leer_rango,
+)
+
+
+# La dirección donde escucha el servicio. Por defecto solo acepta
+# conexiones de la misma computadora.
+HOST = "127.0.0.1"
+PUERTO = 8000
+
+# El número de respuestas recientes que se guardan en memoria
+# y el número de procesos que renderizan las imágenes.
+MAXIMO_CACHE = 256
+PROCESOS_RENDER = 2
+
+# Los filtros que acepta cada consulta: el nombre del parámetro y la
+# columna que filtra. Los valores pueden ser un número, un rango (2015-2023)
+# o una lista separada por comas, como en la línea de comandos.
+CONSULTAS = {
+    "tendencia": {"año": "año", "sexo": "sexo"},
+    "tendencia_mismo_sexo": {"año": "año"},
+    "tendencia_sexo_opuesto": {"año": "año"},
+    "edades_hombres": {"año": "año", "tipo": "tipo"},
+    "edades_mujeres": {"año": "año", "tipo": "tipo"},
+    "mapa": {"año": "año", "entidad": "entidad"},
+    "residencia": {"año": "año", "entidad": "entidad", "residencia": "residencia"},
+    "intervalos": {"año": "año", "entidad": "entidad", "tipo": "tipo"},
+}
+
+# Los filtros cuyos valores son texto en lugar de números.
+FILTROS_TEXTO = {"tipo"}
+
+# Los parámetros que acepta cada imagen.
+IMAGENES = {
+    "tendencia": set(),
+    "tendencia_mismo_sexo": set(),
+    "tendencia_sexo_opuesto": set(),
+    "edades_hombres": set(),
+    "edades_mujeres": set(),
+    "mapa": {"año"},
+    "reporte": {"entidad", "año"},
+}
+
+# Aquí guardaremos los agregados de cada consulta y cada una de sus filas
+# ya convertida a JSON, que se calculan una sola vez al iniciar el servicio.
+# El GeoJSON se carga hasta que se pide el primer mapa.
+_agregados = dict()
+_filas = dict()
+_geojson = None
+
+# Las respuestas recientes, de la menos a la más usada, y las imágenes
+# que se están renderizando en este momento.
+_cache = OrderedDict()
+_en_curso = dict()
+
+# Los procesos que renderizan las imágenes.
+_pool = None
+
+
+def precargar():
+    """
+    Carga el cubo de agregados y calcula todas las consultas,
+    así cada petición solo selecciona filas que ya están en memoria.
+    """
+
+    _agregados["tendencia"] = tasas_por_sexo()
+    _agregados["tendencia_mismo_sexo"] = tasas_por_año(True)
+    _agregados["tendencia_sexo_opuesto"] = tasas_por_año(False)
+    _agregados["edades_hombres"] = edades_por_año(1)
+    _agregados["edades_mujeres"] = edades_por_año(2)
+    _agregados["mapa"] = tasas_por_entidad()
+    _agregados["intervalos"] = intervalos_por_entidad()
+
+    # La residencia se calcula por año, así sus porcentajes son los del año.
+    años = _agregados["mapa"]["año"].unique().tolist()
+
+    residencias = pd.concat(
+        [residencia_por_registro([año]).assign(año=año) for año in años],
+        ignore_index=True,
+    )
+
+    _agregados["residencia"] = residencias[
+        ["año", "entidad", "residencia", "total", "perc"]
+    ]
+
+    # Convertimos cada fila a JSON una sola vez, así responder una consulta
+    # solo es seleccionar filas y unirlas.
+    for nombre, df in _agregados.items():
+        _filas[nombre] = np.array(
+            df.to_json(orient="records", lines=True, force_ascii=False).splitlines(),
+            dtype=object,
+        )
+
+
+def obtener_geojson():
+    """
+    Carga el GeoJSON de México la primera vez que se pide un mapa.
+    Las demás consultas e imágenes no lo necesitan.
+
+    Returns
+    -------
+    dict
+        El GeoJSON simplificado.
+
+    Raises
+    ------
+    FileNotFoundError
+        Si el GeoJSON de México no está disponible.
+
+    """
+
+    global _geojson
+
+    if _geojson is None:
+        if not os.path.exists(RUTA_GEOJSON):
+            raise FileNotFoundError(
+                f"No se encontró el GeoJSON de México: {RUTA_GEOJSON}"
+            )
+
+        _geojson = cargar_geojson()
+
+    return _geojson
+
+
+def consultar(nombre, parametros):
+    """
+    Filtra los agregados de una consulta.
+
+    Parameters
+    ----------
+    nombre : str
+        El nombre de la consulta, una de las llaves de CONSULTAS.
+
+    parametros : dict
+        Los filtros de la petición.
+
+    Returns
+    -------
+    bytes
+        Las filas que cumplen con los filtros, en JSON.
+
+    Raises
+    ------
+    ValueError
+        Si algún parámetro no es válido para la consulta.
+
+    """
+
+    df = _agregados[nombre]
+    seleccion = np.ones(len(df), dtype=bool)
+
+    for parametro, valor in parametros.items():
+        if parametro not in CONSULTAS[nombre]:
+            raise ValueError(f"Parámetro no válido para {nombre}: {parametro}")
+
+        columna = df[CONSULTAS[nombre][parametro]].to_numpy()
+
+        seleccion &= np.isin(columna, leer_valores(parametro, valor))
+
+    return ("[" + ",".join(_filas[nombre][seleccion]) + "]").encode("utf-8")
+
+
+def leer_valores(parametro, texto):
+    """
+    Interpreta los valores de un filtro.
+
+    Parameters
+    ----------
+    parametro : str
+        El nombre del filtro.
+
+    texto : str
+        El valor indicado en la petición.
+
+    Returns
+    -------
+    list
+        Los valores del filtro.
+
+    Raises
+    ------
+    ValueError
+        Si los valores numéricos no son válidos.
+
+    """
+
+    if parametro in FILTROS_TEXTO:
+        return texto.split(",")
+
+    try:
+        return leer_rango(texto)
+    except argparse.ArgumentTypeError as error:
+        raise ValueError(str(error))
+
+
+def validar_imagen(nombre, parametros):
+    """
+    Valida e interpreta los parámetros de una imagen antes de renderizarla.
+
+    Parameters
+    ----------
+    nombre : str
+        El nombre de la imagen, una de las llaves de IMAGENES.
+
+    parametros : dict
+        Los parámetros de la petición.
+
+    Returns
+    -------
+    dict
+        Los valores de los parámetros: el año del mapa, la entidad del reporte
+        y, si se indicaron, los años del reporte (años).
+
+    Raises
+    ------
+    ValueError
+        Si algún parámetro no es válido para la imagen.
+
+    """
+
+    invalidos = sorted(set(parametros) - IMAGENES[nombre])
+
+    if invalidos:
+        raise ValueError(f"Parámetros no válidos para {nombre}: {', '.join(invalidos)}")
+
+    valores = dict()
+
+    if nombre == "mapa":
+        valores["año"] = leer_año(parametros.get("año"))
+    elif nombre == "reporte":
+        valores["entidad"] = leer_entidad(parametros.get("entidad"))
+
+        if "año" in parametros:
+            valores["años"] = leer_valores("año", parametros["año"])
+
+    return valores
+
+
+def figuras_imagen(nombre, valores):
+    """
+    Crea las figuras de una imagen con los agregados ya calculados.
+
+    Parameters
+    ----------
+    nombre : str
+        El nombre de la imagen, una de las llaves de IMAGENES.
+
+    valores : dict
+        Los parámetros de la petición, ya validados con validar_imagen().
+
+    Returns
+    -------
+    list
+        Las figuras (como diccionarios) de la imagen.
+
+    """
+
+    df = _agregados.get(nombre)
+
+    if nombre == "tendencia":
+        return [figura_tendencia(df)]
+    elif nombre == "tendencia_mismo_sexo":
+        return [figura_tendencia_mismo_sexo(df)]
+    elif nombre == "tendencia_sexo_opuesto":
+        return [figura_tendencia_sexo_opuesto(df)]
+    elif nombre == "edades_hombres":
+        return [figura_edades_hombres(df)]
+    elif nombre == "edades_mujeres":
+        return [figura_edades_mujeres(df)]
+    elif nombre == "mapa":
+        año = valores["año"]
+
+        return figuras_mapa(año, df[df["año"] == año], obtener_geojson())
+
+    # El reporte de una entidad, con la residencia de todos los años o de los indicados.
+    entidad = valores["entidad"]
+    años = valores.get("años")
+    tasas = _agregados["mapa"]
+    residencias = _agregados["residencia"]
+
+    if años is not None:
+        residencias = residencias[residencias["año"].isin(años)]
+
+    # Sumamos los años y recalculamos los porcentajes.
+    residencias = (
+        residencias.groupby(["entidad", "residencia"], as_index=False)["total"]
+        .sum()
+        .sort_values(["entidad", "total"], ascending=[True, False], kind="stable")
+    )
+
+    residencias["perc"] = (
+        residencias["total"]
+        / residencias.groupby("entidad")["total"].transform("sum")
+        * 100
+    )
+
+    return figuras_reporte(
+        entidad,
+        tasas[tasas["entidad"] == entidad],
+        residencias[residencias["entidad"] == entidad],
+        años,
+    )
+
+
+def leer_año(texto):
+    """
+    Interpreta el año de un mapa.
+
+    Parameters
+    ----------
+    texto : str
+        El año indicado en la petición.
+
+    Returns
+    -------
+    int
+        El año.
+
+    Raises
+    ------
+    ValueError
+        Si no se indicó un solo año con registros.
+
+    """
+
+    años = _agregados["mapa"]["año"].unique()
+
+    if texto is None or not texto.isdigit() or int(texto) not in años:
+        raise ValueError(f"Indica un año entre {años.min()} y {años.max()}.")
+
+    return int(texto)
+
+
+def leer_entidad(texto):
+    """
+    Interpreta la clave de la entidad de un reporte.
+
+    Parameters
+    ----------
+    texto : str
+        La clave indicada en la petición.
+
+    Returns
+    -------
+    int
+        La clave de la entidad.
+
+    Raises
+    ------
+    ValueError
+        Si la clave no es de una de las 32 entidades.
+
+    """
+
+    if texto is None or not texto.isdigit() or int(texto) not in ENTIDADES:
+        raise ValueError("Indica la clave de una entidad, del 1 al 32.")
+
+    return int(texto)
+
+
+def renderizar_png(figuras):
+    """
+    Renderiza las figuras de una imagen y las une en un solo PNG.
+    Se ejecuta dentro de los procesos de renderizado.
+
+    Parameters
+    ----------
+    figuras : list
+        Las figuras (como diccionarios) de la imagen.
+
+    Returns
+    -------
+    bytes
+        El contenido PNG.
+
+    """
+
+    partes = renderizar(figuras)
+
+    if len(partes) == 1:
+        return partes[0]
+
+    return codificar(componer(partes), "png")
+
+
+async def imagen(nombre, valores, clave):
+    """
+    Renderiza una imagen en los procesos de renderizado, sin bloquear
+    las demás peticiones. Si la misma imagen ya se está renderizando,
+    se espera ese resultado en lugar de renderizarla de nuevo.
+
+    Parameters
+    ----------
+    nombre : str
+        El nombre de la imagen.
+
+    valores : dict
+        Los parámetros de la petición, ya validados con validar_imagen().
+
+    clave : tuple
+        La llave de la petición en la cache.
+
+    Returns
+    -------
+    bytes
+        El contenido PNG.
+
+    """
+
+    if clave not in _en_curso:
+        figuras = figuras_imagen(nombre, valores)
+
+        futuro = asyncio.get_running_loop().run_in_executor(
+            _pool, renderizar_png, figuras
+        )
+
+        _en_curso[clave] = futuro
+        futuro.add_done_callback(lambda _: _en_curso.pop(clave, None))
+
+    # Si una petición se cancela, el renderizado sigue para las demás.
+    return await asyncio.shield(_en_curso[clave])
+
+
+async def responder(metodo, objetivo):
+    """
+    Atiende una petición.
+
+    Parameters
+    ----------
+    metodo : str
+        El método HTTP de la petición.
+
+    objetivo : str
+        La ruta de la petición, con sus parámetros.
+
+    Returns
+    -------
+    HTTPStatus
+        El estado de la respuesta.
+
+    str
+        El tipo de contenido.
+
+    bytes
+        El cuerpo de la respuesta.
+
+    """
+
+    if metodo != "GET":
+        return error(HTTPStatus.METHOD_NOT_ALLOWED, "Solo se aceptan peticiones GET.")
+
+    partes = urlsplit(objetivo)
+    ruta = unquote(partes.path).strip("/")
+
+    # Si un parámetro se repite usamos su último valor.
+    parametros = {
+        parametro: valores[-1] for parametro, valores in parse_qs(partes.query).items()
+    }
+
+    clave = (ruta, tuple(sorted(parametros.items())))
+
+    if clave in _cache:
+        _cache.move_to_end(clave)
+        return _cache[clave]
+
+    nombre, extension = ruta.rsplit(".", 1) if "." in ruta else (ruta, None)
+
+    try:
+        if ruta == "":
+            cuerpo = json.dumps(
+                {"consultas": list(CONSULTAS), "imagenes": list(IMAGENES)}
+            ).encode("utf-8")
+            respuesta = (HTTPStatus.OK, "application/json", cuerpo)
+        elif extension is None and nombre in CONSULTAS:
+            cuerpo = consultar(nombre, parametros)
+            respuesta = (HTTPStatus.OK, "application/json", cuerpo)
+        elif extension == "png" and nombre in IMAGENES:
+            valores = validar_imagen(nombre, parametros)
+
+            # Con los parámetros ya validados, cualquier error al crear
+            # o renderizar la imagen es del servidor y no de la petición.
+            try:
+                cuerpo = await imagen(nombre, valores, clave)
+            except Exception as excepcion:
+                return error(HTTPStatus.INTERNAL_SERVER_ERROR, repr(excepcion))
+
+            respuesta = (HTTPStatus.OK, "image/png", cuerpo)
+        else:
+            return error(HTTPStatus.NOT_FOUND, f"No existe la ruta: /{ruta}")
+    except ValueError as excepcion:
+        return error(HTTPStatus.BAD_REQUEST, str(excepcion))
+    except Exception as excepcion:
+        return error(HTTPStatus.INTERNAL_SERVER_ERROR, repr(excepcion))
+
+    guardar_en_cache(clave, respuesta)
+
+    return respuesta
+
+
+def guardar_en_cache(clave, respuesta):
+    """
+    Guarda una respuesta en la cache. Si la cache está llena
+    se descarta la respuesta usada hace más tiempo.
+
+    Parameters
+    ----------
+    clave : tuple
+        La ruta y los parámetros de la petición.
+
+    respuesta : tuple
+        El estado, el tipo de contenido y el cuerpo de la respuesta.
+
+    """
+
+    _cache[clave] = respuesta
+    _cache.move_to_end(clave)
+
+    while len(_cache) > MAXIMO_CACHE:
+        _cache.popitem(last=False)
+
+
+def error(estado, mensaje):
+    """
+    Crea una respuesta de error en JSON.
+
+    Parameters
+    ----------
+    estado : HTTPStatus
+        El estado de la respuesta.
+
+    mensaje : str
+        La descripción del error.
+
+    Returns
+    -------
+    tuple
+        El estado, el tipo de contenido y el cuerpo de la respuesta.
+
+    """
+
+    cuerpo = json.dumps({"error": mensaje}, ensure_ascii=False).encode("utf-8")
+
+    return estado, "application/json", cuerpo
+
+
+async def atender(reader, writer):
+    """
+    Atiende las peticiones de una conexión. Las conexiones HTTP/1.1
+    se mantienen abiertas hasta que el cliente las cierra.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        El flujo de entrada de la conexión.
+
+    writer : asyncio.StreamWriter
+        El flujo de salida de la conexión.
+
+    """
+
+    try:
+        while True:
+            try:
+                encabezado = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                break
+
+            lineas = encabezado.decode("utf-8", errors="replace").split("\r\n")
+
+            try:
+                metodo, objetivo, version = lineas[0].split(" ")
+            except ValueError:
+                estado, tipo, cuerpo = error(
+                    HTTPStatus.BAD_REQUEST, "Petición no válida."
+                )
+                version = "HTTP/1.0"
+            else:
+                estado, tipo, cuerpo = await responder(metodo, objetivo)
+
+            encabezados = dict()
+
+            for linea in lineas[1:]:
+                nombre, _, valor = linea.partition(":")
+                encabezados[nombre.strip().lower()] = valor.strip().lower()
+
+            # Como no leemos el cuerpo de las peticiones, cerramos la conexión
+            # si traen uno, así no se confunde con la siguiente petición.
+            mantener = (
+                version == "HTTP/1.1"
+                and encabezados.get("connection") != "close"
+                and "content-length" not in encabezados
+                and "transfer-encoding" not in encabezados
+            )
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+                    f"Content-Type: {tipo}\r\n"
+                    f"Content-Length: {len(cuerpo)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n"
+                    "\r\n"
+                ).encode("latin-1")
+                + cuerpo
+            )
+
+            await writer.drain()
+
+            if not mantener:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def servir(host=HOST, puerto=PUERTO, procesos=PROCESOS_RENDER):
+    """
+    Carga los agregados e inicia el servicio HTTP.
+
+    Parameters
+    ----------
+    host : str
+        La dirección donde escucha el servicio.
+
+    puerto : int
+        El puerto donde escucha el servicio.
+
+    procesos : int
+        El número de procesos que renderizan las imágenes.
+
+    """
+
+    global _pool
+
+    precargar()
+
+    # Usamos 'spawn' para que cada proceso inicie su propia instancia de Kaleido.
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=iniciar_kaleido,
+    ) as pool:
+        _pool = pool
+
+        servidor = await asyncio.start_server(atender, host, puerto)
+
+        print(f"Sirviendo en http://{host}:{puerto}/")
+
+        async with servidor:
+            await servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sirve los agregados y las gráficas del matrimonio igualitario en México."
+    )
+
+    parser.add_argument("--host", default=HOST, help="La dirección donde escuchar.")
+
+    parser.add_argument(
+        "--puerto", type=int, default=PUERTO, help="El puerto donde escuchar."
+    )
+
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=PROCESOS_RENDER,
+        help="El número de procesos que renderizan las imágenes.",
+    )
+
+    parser.add_argument(
+        "--cache",
+        type=int,
+        default=MAXIMO_CACHE,
+        help="El número de respuestas recientes que se guardan en memoria.",
+    )
+
+    args = parser.parse_args()
+
+    MAXIMO_CACHE = args.cache
+
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.procesos))
+    except KeyboardInterrupt:
+        pass
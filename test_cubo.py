@@ -0,0 +1,57 @@
+import pandas as pd
+
+import cubo
+from datos import COLUMNAS, ESQUEMA, guardar_particion
+
+
+def registros(año, filas=3):
+    """
+    Crea registros mínimos de un año con las columnas y tipos de ESQUEMA.
+    """
+
+    return pd.DataFrame(
+        {
+            "ANIO_REGIS": [año] * filas,
+            "ENT_REGIS": [9] * filas,
+            "SEXO_CON1": [1] * filas,
+            "SEXO_CON2": [1] * filas,
+            "EDAD_CON1": [30] * filas,
+            "EDAD_CON2": [32] * filas,
+            "ENTRH_CON1": [9] * filas,
+            "ENTRH_CON2": [9] * filas,
+        }
+    )[COLUMNAS].astype(ESQUEMA)
+
+
+def test_años_no_disponibles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cubo, "_tablas", dict())
+
+    # Solo se guardan los registros, sin crear las tablas parciales del año.
+    guardar_particion(registros(2020), 2020)
+
+    for ruta, construir, _ in cubo.tablas_agregadas():
+        tabla = cubo.leer_tabla_particionada(ruta, construir, [1999])
+        esperada = construir(registros(2020))
+
+        assert len(tabla) == 0
+        assert tabla.dtypes.to_dict() == esperada.dtypes.to_dict()
+
+    assert len(cubo.cargar_cubo([1999])) == 0
+
+
+def test_años_sin_particiones(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cubo, "_tablas", dict())
+
+    tabla = cubo.leer_tabla_particionada(cubo.RUTA_CUBO, cubo.construir_cubo, [1999])
+
+    assert len(tabla) == 0
+    assert list(tabla.columns) == cubo.DIMENSIONES + [
+        "total",
+        "validos",
+        "suma_edad1",
+        "suma_edad2",
+        "suma2_edad1",
+        "suma2_edad2",
+    ]